@@ -0,0 +1,94 @@
+# benchmark_tabs.py
+# One Chrome per worker vs. one Chrome with N tabs: throughput and memory, against the local fixture SERP server.
+#
+#   python benchmark_tabs.py --concurrency 4 --keywords 24
+#
+# Needs Chrome + chromedriver like the tracker does, and `pip install psutil` for the memory numbers.
+
+import argparse
+import logging
+import threading
+import time
+
+import google_rank_tracker as grt
+from serp_fixture_server import start_fixture_server
+
+
+def _sample_memory(drivers_of, samples, stop):
+    # Peak-hunting: RSS of every Chrome tree we own, every half second
+    while not stop.is_set():
+        sizes = [grt.chrome_rss_mb(driver) for driver in drivers_of()]
+        if sizes and all(size is not None for size in sizes):
+            samples.append(sum(sizes))
+        stop.wait(0.5)
+
+
+def run_mode(mode, concurrency, keywords, base_url, max_pages):
+    browsers, trackers = [], []
+    started = time.monotonic()
+    try:
+        if mode == "browsers":
+            browsers = [grt.GoogleRankTracker(driver_path=grt.CHROME_DRIVER_PATH, target_domain=grt.TARGET_DOMAIN,
+                                              worker_id=f"browser-{n + 1}", search_base_url=base_url)
+                        for n in range(concurrency)]
+            trackers = browsers
+        else:
+            browsers = [grt.TabbedBrowser(driver_path=grt.CHROME_DRIVER_PATH, target_domain=grt.TARGET_DOMAIN,
+                                          worker_id="browser-1", search_base_url=base_url)]
+            trackers = browsers[0].open_tabs(concurrency)
+        startup_s = time.monotonic() - started
+
+        samples, stop = [], threading.Event()
+        sampler = threading.Thread(target=_sample_memory, args=(lambda: [b.driver for b in browsers], samples, stop),
+                                   daemon=True)
+        sampler.start()
+        check_started = time.monotonic()
+        results = grt.run_keyword_checks(trackers, keywords, max_pages)
+        elapsed = time.monotonic() - check_started
+        stop.set()
+        sampler.join()
+    finally:
+        for tracker in trackers + browsers:
+            tracker.close()
+
+    ok = sum(1 for r in results if r['status'] in ("Found", "Not Found"))
+    return {
+        'mode': f"{concurrency} {mode}",
+        'checks': len(results),
+        'ok': ok,
+        'startup_s': round(startup_s, 1),
+        'elapsed_s': round(elapsed, 1),
+        'checks_per_min': round(60.0 * len(results) / elapsed, 1) if elapsed else 0.0,
+        'peak_rss_mb': round(max(samples), 0) if samples else None,
+        'checks_per_min_per_gb': round(60.0 * len(results) / elapsed / (max(samples) / 1024), 1) if samples and elapsed else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-tab vs. multi-browser rank checks.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Browsers in one mode, tabs in the other")
+    parser.add_argument("--keywords", type=int, default=24)
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fixture server stall per page (seconds)")
+    parser.add_argument("--keyword-delay", type=float, nargs=2, default=(1.0, 2.0), help="Nap between keywords per worker")
+    parser.add_argument("--page-delay", type=float, nargs=2, default=(0.5, 1.0), help="Nap between SERP pages")
+    args = parser.parse_args()
+
+    # Real-Google pacing would make this take forever; the ratio between modes is what we're after
+    grt.RANDOM_DELAY_BETWEEN_KEYWORDS = tuple(args.keyword_delay)
+    grt.RANDOM_DELAY_BETWEEN_PAGES = tuple(args.page_delay)
+    grt.TAKE_SCREENSHOTS_ON_ERROR = False
+    # Tabs run with implicit wait 0 (TabbedBrowser.implicit_wait). Give plain browsers the same, or every absent
+    # CAPTCHA/consent XPath stalls them for IMPLICIT_WAIT_TIME and we'd be benchmarking that instead.
+    grt.GoogleRankTracker.implicit_wait = grt.TabbedBrowser.implicit_wait
+    # No session_store for the trackers below: fixture cookies would only pollute the real Google profiles
+    if grt.psutil is None:
+        logging.warning("psutil isn't installed, so no memory numbers. `pip install psutil`")
+
+    fixture = start_fixture_server(target_domain=grt.TARGET_DOMAIN, latency=args.latency)
+    keywords = [f"benchmark keyword {n}" for n in range(args.keywords)]
+    try:
+        rows = [run_mode(mode, args.concurrency, keywords, fixture.base_url, args.max_pages) for mode in ("browsers", "tabs")]
+    finally:
+        fixture.shutdown()
+    logging.info(f"\n--- TABS VS BROWSERS ---\n{grt.pd.DataFrame(rows).to_string(index=False)}")
@@ -1,19 +1,31 @@
 # google_rank_tracker.py
 
+import collections
+import contextlib
 import logging
 import random
+import threading
 import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import pandas as pd
 
+try:
+    import psutil # Optional: only needed for Chrome memory numbers
+except ImportError:
+    psutil = None
+
+from rank_history import load_result_history
+from rank_report import build_rank_report, log_rank_report
+from rank_scheduler import build_check_schedule, log_schedule_coverage
+from session_store import SessionStateStore
+
 try:
     from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.common.keys import Keys
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
     from selenium.webdriver.chrome.service import Service as ChromeService
 except ImportError:
     print("ERROR: Yo, install the damn libraries first! `pip install selenium pandas openpyxl`")
@@ -39,6 +51,9 @@ RESULTS_PER_PAGE_ESTIMATE = 10 # Google's usually around 10, but can vary
 CHROME_DRIVER_PATH = None # Recommended: Let Selenium Manager do its thing (v4.6+)
 
 # Advanced Settings (usually fine as is)
+SEARCH_BASE_URL = "https://www.google.com" # Point at serp_fixture_server.py for offline testing/benchmarks
+SEARCH_LANGUAGE = "en" # Google's `hl`
+SEARCH_COUNTRY = "us" # Google's `gl`
 DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36"
 RANDOM_DELAY_BETWEEN_KEYWORDS = (7, 12)  # (seconds)
 RANDOM_DELAY_BETWEEN_PAGES = (3, 6)    # (seconds)
@@ -47,20 +62,281 @@ EXPLICIT_WAIT_TIME = 15 # (seconds)
 TAKE_SCREENSHOTS_ON_ERROR = True
 LOG_LEVEL = logging.INFO # DEBUG, INFO, WARNING, ERROR, CRITICAL
 OUTPUT_FILENAME_PREFIX = "google_rank_report"
+
+# Retry policy per failure class: how many retries it gets, the nap range before each retry
+# (seconds, multiplied by how many times that class has failed) and whether to trash the browser first.
+RETRY_POLICIES = {
+    "timeout":      {"retries": 2, "backoff": (4, 9),   "restart_driver": False},
+    "captcha":      {"retries": 1, "backoff": (45, 90), "restart_driver": True},
+    "driver_crash": {"retries": 2, "backoff": (2, 5),   "restart_driver": True},
+    "parse_miss":   {"retries": 1, "backoff": (3, 6),   "restart_driver": False},
+    "unexpected":   {"retries": 1, "backoff": (10, 25), "restart_driver": False},
+}
+CAPTCHA_BREAKER_THRESHOLD = 2 # CAPTCHAs in a row before a worker/proxy gets benched
+CAPTCHA_BREAKER_COOLDOWN = 900 # (seconds) How long a benched worker/proxy sits out
+NUM_WORKERS = 1 # Parallel Chrome instances. Each one eats RAM, go easy.
+PROXIES = [] # Optional, e.g. ["http://1.2.3.4:8080"]. Handed out round-robin to the workers.
+HEDGE_AFTER_SECONDS = None # Reissue a check on an idle worker if it drags on longer than this (None = off)
+TABS_PER_BROWSER = 1 # >1 = each worker's Chrome runs this many checks side by side in tabs. Way less RAM per check.
+
+# Driver recycling: long sessions bloat. Chrome gets swapped for a fresh one *between* keywords when any of these trip.
+RECYCLE_AFTER_KEYWORDS = 40 # None = never
+RECYCLE_AFTER_MINUTES = 45 # None = never
+RECYCLE_ABOVE_RSS_MB = 1500 # Chrome process tree RSS. Needs `pip install psutil`. None = never
+MEMORY_LOG_FILENAME_PREFIX = "chrome_memory" # Per-keyword memory curve as CSV. None = don't save it
+
+# Warm sessions: consent cookies etc. get saved after good checks and injected into every new Chrome,
+# so restarts skip the consent pop-up and don't look like a brand-new visitor. Pooled per locale.
+SESSION_STATE_DIR = "session_state" # None = every Chrome starts cold, like before
+SESSION_PROFILE_MAX_AGE_HOURS = 72 # Older profiles get expired
+SESSION_PROFILES_PER_LOCALE = 4 # Pool size per locale; beyond that, workers share profiles
+SESSION_SAVE_INTERVAL_S = 300 # Re-save a profile's cookies at most this often
+
+# Scheduling: only re-check keywords that are due, based on the past reports sitting next to this script.
+# Stable, far-from-page-break, low-priority keywords get checked less often.
+USE_SCHEDULER = True # False = check every keyword every run, like the old days
+RUN_REQUEST_BUDGET = None # Max SERP page loads per run (None = no cap). Overdue + high priority go first.
+KEYWORD_PRIORITIES = {} # e.g. {"machine learning": 3.0}. Higher = checked more often. Unlisted = 1.0
+MIN_CHECK_INTERVAL_DAYS = 1
+MAX_CHECK_INTERVAL_DAYS = 30
+
+# Tag report: avg position, visibility, top-3/top-10 share and gains/losses per keyword group, per period.
+BUILD_TAG_REPORT = True
+KEYWORD_TAGS = {} # e.g. {"machine learning": ["ai", "core"], "google": "brand"}. Untagged ones still count in "(all)".
+REPORT_PERIOD = "W" # Pandas period alias: "W" weekly, "M" monthly, "D" daily
+REPORT_FILENAME_PREFIX = "google_tag_report" # Keep it different from OUTPUT_FILENAME_PREFIX or it'll be read as history
 # --- END OF CONFIG ---
 
 logging.basicConfig(level=LOG_LEVEL,
                     format='%(asctime)s - %(levelname)s - %(module)s - %(message)s',
                     datefmt='%Y-%m-%d %H:%M:%S')
 
+FAILURE_TIMEOUT = "timeout"
+FAILURE_CAPTCHA = "captcha"
+FAILURE_DRIVER_CRASH = "driver_crash"
+FAILURE_PARSE_MISS = "parse_miss"
+FAILURE_UNEXPECTED = "unexpected"
+
+# Error text that means the browser itself is gone, not just the page misbehaving.
+DRIVER_CRASH_MARKERS = ("session id is null", "target window already closed", "invalid session id",
+                        "chrome not reachable", "no such window", "disconnected", "shared browser is gone")
+
+
+class CaptchaDetected(Exception):
+    """Google threw its CAPTCHA / 'unusual traffic' wall at us instead of results."""
+    def __init__(self, page=0):
+        super().__init__(f"CAPTCHA wall on SERP page {page}")
+        self.page = page
+
+
+class ParseMiss(Exception):
+    """The SERP loaded but none of our result selectors matched a thing."""
+
+
+class CheckCancelled(Exception):
+    """Another copy of this (hedged) check already answered, so this one bails at its next wait."""
+
+
+def classify_failure(exc):
+    if isinstance(exc, CaptchaDetected):
+        return FAILURE_CAPTCHA
+    if isinstance(exc, ParseMiss):
+        return FAILURE_PARSE_MISS
+    if isinstance(exc, TimeoutException): # Check before WebDriverException, it's a subclass
+        return FAILURE_TIMEOUT
+    if isinstance(exc, WebDriverException) and any(marker in str(exc).lower() for marker in DRIVER_CRASH_MARKERS):
+        return FAILURE_DRIVER_CRASH
+    return FAILURE_UNEXPECTED
+
+
+class CircuitBreaker:
+    """Benches a worker (or the proxy it's behind) for a while once it keeps hitting CAPTCHAs."""
+    def __init__(self, threshold=CAPTCHA_BREAKER_THRESHOLD, cooldown=CAPTCHA_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._strikes = {}
+        self._open_until = {}
+        self._lock = threading.Lock()
+
+    def record_captcha(self, key):
+        with self._lock:
+            self._strikes[key] = self._strikes.get(key, 0) + 1
+            if self._strikes[key] < self.threshold:
+                return False
+            self._strikes[key] = 0
+            self._open_until[key] = time.monotonic() + self.cooldown
+        logging.warning(f"Circuit breaker OPEN for '{key}' after {self.threshold} CAPTCHAs. Benched for {self.cooldown}s.")
+        return True
+
+    def record_success(self, key):
+        with self._lock:
+            self._strikes[key] = 0
+
+    def cooldown_remaining(self, key):
+        with self._lock:
+            return max(0.0, self._open_until.get(key, 0.0) - time.monotonic())
+
+
+class RetryStats:
+    """Keeps score of what each failure class costs: failures, retries, give-ups and seconds burned."""
+    COLUMNS = ['failure_class', 'failures', 'retries', 'gave_up', 'wasted_s', 'backoff_s', 'breaker_pause_s']
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.hedges_issued = 0
+        self.hedges_won = 0
+
+    def _row(self, failure_class):
+        return self._rows.setdefault(failure_class, dict.fromkeys(self.COLUMNS[1:], 0))
+
+    def record_failure(self, failure_class, wasted_seconds, backoff_seconds=0.0, gave_up=False):
+        with self._lock:
+            row = self._row(failure_class)
+            row['failures'] += 1
+            row['retries' if not gave_up else 'gave_up'] += 1
+            row['wasted_s'] += wasted_seconds
+            row['backoff_s'] += backoff_seconds
+
+    def record_breaker_pause(self, seconds):
+        with self._lock:
+            self._row(FAILURE_CAPTCHA)['breaker_pause_s'] += seconds
+
+    def record_hedge(self, won=False):
+        with self._lock:
+            if won:
+                self.hedges_won += 1
+            else:
+                self.hedges_issued += 1
+
+    def summary(self):
+        with self._lock:
+            rows = [{'failure_class': fc, **row} for fc, row in sorted(self._rows.items())]
+        summary_df = pd.DataFrame(rows, columns=self.COLUMNS)
+        summary_df['overhead_s'] = summary_df[['wasted_s', 'backoff_s', 'breaker_pause_s']].sum(axis=1)
+        return summary_df.round(1)
+
+
+RESULTS_CONTAINER_SELECTOR = "div#search, div.g, div.hlcw0c, div.Gx5Zad"
+# Set right before we navigate away; a fresh document won't have it, so we know the new page really landed.
+STALE_PAGE_MARKER_JS = "window.__rankTrackerStale = true;"
+PAGE_READY_JS = "return !window.__rankTrackerStale && document.readyState === 'complete';"
+# True when Google genuinely has nothing: its "no results" notice, or a results container with no links or text in it.
+# A container that *does* have content our selectors couldn't read is a parse miss, not an empty SERP.
+EMPTY_SERP_JS = """
+const text = document.body ? document.body.innerText : '';
+if (/did not match any documents|No results found for/i.test(text)) return true;
+const box = document.querySelector('div#rso') || document.querySelector('div#search');
+return !!box && !box.querySelector('a[href]') && box.innerText.trim() === '';
+"""
+
+
+def chrome_rss_mb(driver):
+    """RSS of chromedriver + every Chrome process under it, in MB. None if psutil is missing or it can't tell."""
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+    except Exception: # No psutil, no driver, or the process is already gone
+        return None
+    total = 0
+    for process in processes:
+        try: total += process.memory_info().rss
+        except Exception: pass # Renderer died between listing and asking, happens
+    return total / (1024 * 1024)
+
+
+def _cdp_cookie(cookie):
+    # Selenium's cookie dict -> CDP's Network.CookieParam, which calls "expiry" "expires"
+    cdp_cookie = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+    if "expiry" in cookie:
+        cdp_cookie["expires"] = cookie["expiry"]
+    return cdp_cookie
+
+
+class DriverLifecycle:
+    """Decides when a Chrome session has done enough, and keeps the memory curve while it runs."""
+    COLUMNS = ['timestamp', 'worker_id', 'driver_generation', 'keywords_since_start', 'driver_age_s', 'rss_mb']
+    _warned_no_psutil = False
+
+    def __init__(self, max_keywords=RECYCLE_AFTER_KEYWORDS, max_age_minutes=RECYCLE_AFTER_MINUTES,
+                 max_rss_mb=RECYCLE_ABOVE_RSS_MB):
+        self.max_keywords = max_keywords
+        self.max_age_minutes = max_age_minutes
+        self.max_rss_mb = max_rss_mb
+        if max_rss_mb and psutil is None and not DriverLifecycle._warned_no_psutil:
+            DriverLifecycle._warned_no_psutil = True # Once per process is plenty
+            logging.warning(f"Memory watchdog is OFF: recycling above {max_rss_mb}MB needs psutil. `pip install psutil`")
+        self.recycles = collections.Counter()
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def recycle_reason(self, tracker):
+        if self.max_keywords and tracker.keywords_since_start >= self.max_keywords:
+            return f"keywords ({tracker.keywords_since_start} >= {self.max_keywords})"
+        age_minutes = tracker.driver_age_s() / 60
+        if self.max_age_minutes and age_minutes >= self.max_age_minutes:
+            return f"age ({age_minutes:.0f}min >= {self.max_age_minutes}min)"
+        rss_mb = tracker.last_rss_mb
+        if self.max_rss_mb and rss_mb is not None and rss_mb >= self.max_rss_mb:
+            return f"memory ({rss_mb:.0f}MB >= {self.max_rss_mb}MB)"
+        return None
+
+    def record_recycle(self, reason):
+        with self._lock:
+            self.recycles[reason.split(" ")[0]] += 1
+
+    def record_sample(self, tracker):
+        tracker.last_rss_mb = chrome_rss_mb(tracker.driver) if tracker.driver else None
+        sample = {'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'worker_id': tracker.worker_id,
+                  'driver_generation': tracker.driver_generation, 'keywords_since_start': tracker.keywords_since_start,
+                  'driver_age_s': round(tracker.driver_age_s(), 1),
+                  'rss_mb': round(tracker.last_rss_mb, 1) if tracker.last_rss_mb is not None else None}
+        with self._lock:
+            self._samples.append(sample)
+        logging.debug(f"[{tracker.worker_id}] Chrome memory: {sample['rss_mb']}MB after "
+                      f"{sample['keywords_since_start']} keywords, {sample['driver_age_s']:.0f}s old.")
+
+    def memory_curve(self):
+        with self._lock:
+            return pd.DataFrame(self._samples, columns=self.COLUMNS)
+
+
 class GoogleRankTracker:
-    def __init__(self, driver_path=None, target_domain="", user_agent=None):
+    implicit_wait = IMPLICIT_WAIT_TIME
+
+    def __init__(self, driver_path=None, target_domain="", user_agent=None, proxy=None, worker_id=None,
+                 circuit_breaker=None, retry_stats=None, search_base_url=None, lifecycle=None,
+                 language=None, country=None, session_store=None):
         self.driver_path = driver_path
         if not target_domain:
             raise ValueError("Target domain can't be empty, dude.")
         self.target_domain = target_domain.lower().replace("www.", "").replace("http://", "").replace("https://", "")
         self.user_agent = user_agent or DEFAULT_USER_AGENT
+        self.proxy = proxy
+        self.worker_id = worker_id or "worker-1"
+        self.breaker_key = proxy or self.worker_id # A burned proxy is burned for every worker behind it
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.retry_stats = retry_stats or RetryStats()
+        self.checks_done = 0
+        self.check_started_at = None
+        self.last_check_finished_at = None
+        self.cancel_check = threading.Event() # Set when another copy of a hedged check already answered
+        self.search_base_url = (search_base_url or SEARCH_BASE_URL).rstrip("/")
+        self.lifecycle = lifecycle or DriverLifecycle()
+        self.keywords_since_start = 0
+        self.driver_started_at = None
+        self.last_rss_mb = None
+        self.language = language or SEARCH_LANGUAGE
+        self.country = country or SEARCH_COUNTRY
+        self.locale = f"{self.language}-{self.country}".lower()
+        self.session_store = session_store # Shared across workers, so the entry point builds it (see build_session_store)
+        self.session_profile = None
+        self.consent_settled = False # Once consent is dealt with, the rest of this Chrome session skips it
+        self._session_saved_at = 0.0
         self.driver = None
+        self.driver_generation = 0 # Bumped on every (re)start so tabs can tell their handles went stale
+        self._driver_lock = threading.RLock() # One WebDriver session = one command at a time, whoever's asking
+        self._active_handle = None
         self._setup_driver()
 
     def _get_webdriver_options(self):
@@ -70,8 +346,10 @@ class GoogleRankTracker:
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--lang=en-US,en;q=0.9") # Request English results for consistency
+        chrome_options.add_argument(f"--lang={self.language}-{self.country.upper()},{self.language};q=0.9") # Match hl/gl for consistency
         chrome_options.add_argument("--blink-settings=imagesEnabled=false") # No images, faster
+        if self.proxy:
+            chrome_options.add_argument(f"--proxy-server={self.proxy}")
         return chrome_options
 
     def _setup_driver(self):
@@ -83,14 +361,65 @@ class GoogleRankTracker:
             else:
                 logging.info("ChromeDriver path not set. Selenium Manager will try to handle it (Selenium 4.6+)...")
                 self.driver = webdriver.Chrome(options=options)
-            self.driver.implicitly_wait(IMPLICIT_WAIT_TIME)
+            self.driver.implicitly_wait(self.implicit_wait)
+            self.driver_generation += 1
+            self.driver_started_at = time.monotonic()
+            self.keywords_since_start = 0
+            self.last_rss_mb = None
+            self.consent_settled = False
+            self._active_handle = self.driver.current_window_handle
             logging.info("Chrome browser fired up (headless). Let's do this.")
+            self._restore_session_state()
         except WebDriverException as e:
             logging.error(f"Damn, ChromeDriver setup failed: {e}")
             logging.error("Make sure ChromeDriver is installed and in your PATH, or the CHROME_DRIVER_PATH is correct.")
             logging.error("Get ChromeDriver: https://chromedriver.chromium.org/downloads")
             raise
 
+    def _session_holder(self):
+        # Whoever owns the cookie jar. For tabs that's the browser they live in.
+        return self
+
+    def _restore_session_state(self):
+        if not self.session_store:
+            return
+        if self.session_profile is None:
+            self.session_profile = self.session_store.checkout(self.locale)
+        if not self.session_profile.is_warm:
+            return
+        # CDP sets cookies for any domain without having to load a page there first, unlike add_cookie()
+        cdp_cookies = [_cdp_cookie(cookie) for cookie in self.session_profile.cookies]
+        try:
+            with self._tab():
+                self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+            self.consent_settled = True # Consent cookies came along, no pop-up to wait for
+            logging.info(f"[{self.worker_id}] Warm session restored: {len(cdp_cookies)} cookies from profile '{self.session_profile.profile_id}'.")
+        except Exception as e:
+            logging.warning(f"[{self.worker_id}] Couldn't restore session cookies, starting cold: {e}")
+
+    def _save_session_state(self, force=False):
+        holder = self._session_holder()
+        if not holder.session_store or not holder.session_profile:
+            return
+        if not force and time.monotonic() - holder._session_saved_at < SESSION_SAVE_INTERVAL_S:
+            return
+        try:
+            with self._tab():
+                cookies = self.driver.get_cookies()
+        except Exception as e:
+            logging.debug(f"Couldn't read cookies to save the session: {e}")
+            return
+        if cookies:
+            holder.session_store.save(holder.session_profile, cookies)
+            holder._session_saved_at = time.monotonic()
+            logging.debug(f"[{self.worker_id}] Saved {len(cookies)} cookies to session profile '{holder.session_profile.profile_id}'.")
+
+    def _discard_session_state(self):
+        holder = self._session_holder()
+        if holder.session_store and holder.session_profile:
+            holder.session_store.discard(holder.session_profile)
+            holder.session_profile = None # Next (re)start checks out a different one
+
     def _normalize_url(self, url_string):
         if not url_string: return ""
         try:
@@ -100,24 +429,59 @@ class GoogleRankTracker:
         except Exception:
             return ""
 
-    def _handle_cookie_consent(self, wait):
+    @contextlib.contextmanager
+    def _tab(self):
+        # Every driver call goes through here. Plain trackers just serialize; TabWorker also switches tabs.
+        with self._driver_lock:
+            yield
+
+    def _poll(self, probe, timeout=EXPLICIT_WAIT_TIME, poll_every=0.5):
+        # Like WebDriverWait, but the naps happen *outside* the driver lock so other tabs get a turn.
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.cancel_check.is_set():
+                raise CheckCancelled()
+            with self._tab():
+                try: outcome = probe(self.driver)
+                except (NoSuchElementException, StaleElementReferenceException): outcome = None
+            if outcome:
+                return outcome
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Gave up waiting after {timeout}s")
+            time.sleep(poll_every)
+
+    def _navigate(self, url):
+        with self._tab():
+            self.driver.get(url)
+
+    def _wait_for_page_ready(self, timeout=EXPLICIT_WAIT_TIME):
+        self._poll(lambda driver: driver.execute_script(PAGE_READY_JS), timeout)
+
+    def _handle_cookie_consent(self):
         # These XPaths are a crapshoot, Google changes 'em. Good luck.
         consent_selectors = [
             "//button[.//div[contains(text(),'Accept all')]]", "//button[.//div[contains(text(),'Reject all')]]",
             "//button[@id='L2AGLb']", "//button[@id='W0wltc']", "//div[text()='I agree']",
             "//button[contains(., 'Agree') or contains(., 'Accept') or contains(., 'Alles akzeptieren') or contains(., 'Tout accepter') or contains(., 'Accetta tutto') or contains(., 'Aceptar todo')]"
         ]
-        for selector in consent_selectors:
-            try:
-                consent_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                consent_button.click()
-                logging.info(f"Cookie consent button clicked (selector: '{selector[:30]}...').")
-                time.sleep(0.5)
-                return True
-            except TimeoutException:
-                continue
-        logging.info("No cookie consent pop-up found or needed to smash.")
-        return False
+        def click_consent(driver):
+            for selector in consent_selectors:
+                for button in driver.find_elements(By.XPATH, selector):
+                    if button.is_displayed() and button.is_enabled():
+                        button.click()
+                        return selector
+            # Results on screen and nothing to click = no pop-up this time, don't sit out the whole timeout
+            return "none" if driver.find_elements(By.CSS_SELECTOR, RESULTS_CONTAINER_SELECTOR) else None
+        try:
+            selector = self._poll(click_consent)
+        except TimeoutException:
+            selector = "none"
+        if selector == "none":
+            logging.info("No cookie consent pop-up found or needed to smash.")
+            return False
+        logging.info(f"Cookie consent button clicked (selector: '{selector[:30]}...').")
+        time.sleep(0.5)
+        return True
 
     def _extract_search_results(self):
         # Google's SERP structure is like shifting sands. These selectors are a starting point.
@@ -165,28 +529,36 @@ class GoogleRankTracker:
         if not all_links_in_page: logging.warning("No results found with any defined selectors on this page. Uh oh.")
         return all_links_in_page
 
-    def _click_next_page(self, wait):
+    def _click_next_page(self):
         # "Next" button selectors. Also a moving target.
         next_page_selectors = [
             "//a[@id='pnnext']", "//a[@aria-label='Next page']", "//a[@aria-label='Page suivante']",
             "//span[text()='Next']/parent::a", "//footer//a[contains(@aria-label, 'Next') or contains(@aria-label, 'Suivant')]"
         ]
-        for selector in next_page_selectors:
-            try:
-                next_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", next_button) # Make sure it's in view
-                time.sleep(0.2) # Tiny pause before click
-                next_button.click()
-                logging.info(f"Hopped to next page (selector: '{selector[:30]}...').")
-                return True
-            except TimeoutException:
-                continue
-            except Exception as e: # Other errors like ElementClickInterceptedException
-                logging.warning(f"Problem clicking 'Next' with selector '{selector[:30]}...': {e}")
-                # Could try JS click: self.driver.execute_script("arguments[0].click();", next_button)
-                continue
-        logging.warning("Can't find the 'Next' page button. End of the line?")
-        return False
+        def click_next(driver):
+            for selector in next_page_selectors:
+                try:
+                    next_button = next((b for b in driver.find_elements(By.XPATH, selector) if b.is_displayed() and b.is_enabled()), None)
+                    if not next_button:
+                        continue
+                    driver.execute_script("arguments[0].scrollIntoView(true);", next_button) # Make sure it's in view
+                    time.sleep(0.2) # Tiny pause before click
+                    driver.execute_script(STALE_PAGE_MARKER_JS)
+                    next_button.click()
+                    return selector
+                except Exception as e: # Other errors like ElementClickInterceptedException
+                    logging.warning(f"Problem clicking 'Next' with selector '{selector[:30]}...': {e}")
+                    # Could try JS click: self.driver.execute_script("arguments[0].click();", next_button)
+                    continue
+            return None
+        try:
+            selector = self._poll(click_next)
+        except TimeoutException:
+            logging.warning("Can't find the 'Next' page button. End of the line?")
+            return False
+        logging.info(f"Hopped to next page (selector: '{selector[:30]}...').")
+        self._wait_for_page_ready()
+        return True
 
     def _check_for_captcha(self):
         captcha_indicators = [
@@ -195,7 +567,7 @@ class GoogleRankTracker:
             "//p[contains(text(),'systems have detected unusual traffic')]"
         ]
         current_url = self.driver.current_url
-        if "ipv4.google.com/sorry" in current_url or "consent.google.com" in current_url and "continue" in current_url: # Google's CAPTCHA/consent wall
+        if "ipv4.google.com/sorry" in current_url or "/sorry/" in urllib.parse.urlparse(current_url).path: # Google's CAPTCHA wall
             logging.error(f"Hit Google's CAPTCHA/sorry wall at URL: {current_url}")
             return True
 
@@ -212,104 +584,487 @@ class GoogleRankTracker:
                 continue
         return False
 
-    def get_rank_for_keyword(self, keyword, max_pages=3, retries=1):
-        if not self.driver:
-            logging.error("Browser driver's MIA. Can't search.")
-            return {"keyword": keyword, "rank": "Error - No Driver", "url": "", "title": "", "page": 0, "status": "Error"}
+    def _on_consent_wall(self):
+        # consent.google.com/...?continue=<our search>: a consent step, not a CAPTCHA. Click through it.
+        return "consent.google.com" in urllib.parse.urlparse(self.driver.current_url).netloc
 
-        for attempt in range(retries + 1):
-            if attempt > 0:
-                logging.info(f"Retrying ({attempt}/{retries}) for '{keyword}' after a nap...")
-                time.sleep(random.uniform(10, 25) * attempt)
+    def _failure_result(self, keyword, failure_class, page=0, rank=None):
+        status = "CAPTCHA" if failure_class == FAILURE_CAPTCHA else "Error"
+        return {"keyword": keyword, "rank": rank or f"Error - Max Retries ({failure_class})", "url": "", "title": "",
+                "page": page, "status": status, "failure_class": failure_class}
 
-            try:
-                logging.info(f"🔍 Hunting for '{keyword}' (Attempt {attempt + 1})")
-                # Use `num` for more results, `hl` (language) and `gl` (geo) for consistency.
-                # Google can still override these.
-                search_url = f"https://www.google.com/search?q={urllib.parse.quote_plus(keyword)}&num={RESULTS_PER_PAGE_ESTIMATE * max_pages}&hl=en&gl=us&filter=0&start=0"
-                self.driver.get(search_url)
-                wait = WebDriverWait(self.driver, EXPLICIT_WAIT_TIME)
+    def _cancelled_result(self, keyword):
+        logging.info(f"[{self.worker_id}] Dropping '{keyword}', the other copy already answered.")
+        return self._failure_result(keyword, FAILURE_UNEXPECTED, rank="Error - Cancelled")
+
+    def _wait_out_circuit_breaker(self):
+        pause = self.circuit_breaker.cooldown_remaining(self.breaker_key)
+        if pause > 0:
+            logging.warning(f"[{self.worker_id}] '{self.breaker_key}' is benched. Sitting out {pause:.0f}s...")
+            pause_started = time.monotonic()
+            self.cancel_check.wait(pause) # A hedged copy that lost doesn't need to sit out the whole bench
+            self.retry_stats.record_breaker_pause(time.monotonic() - pause_started)
+
+    def driver_age_s(self):
+        return time.monotonic() - self.driver_started_at if self.driver_started_at else 0.0
+
+    def _recycle_driver(self, reason):
+        memory_note = f"{self.last_rss_mb:.0f}MB" if self.last_rss_mb is not None else "unknown size (no psutil?)"
+        logging.info(f"[{self.worker_id}] Recycling Chrome: {reason}. It did {self.keywords_since_start} keywords "
+                     f"in {self.driver_age_s() / 60:.1f}min, last seen at {memory_note}.")
+        self.lifecycle.record_recycle(reason)
+        self._save_session_state(force=True)
+        self.close(keep_session=True)
+        try:
+            self._setup_driver()
+        except Exception as setup_err:
+            logging.critical(f"Driver recycle FAILED: {setup_err}") # The next check tries to bring one back
+
+    def _before_keyword(self):
+        # Only ever between keywords: a recycle mid-check would throw away a half-scanned SERP
+        reason = self.lifecycle.recycle_reason(self) if self.driver else None
+        if reason:
+            self._recycle_driver(reason)
 
+    def _after_keyword(self):
+        self.keywords_since_start += 1
+        self.lifecycle.record_sample(self)
+
+    def _restart_driver(self, failure_class=None):
+        logging.error(f"[{self.worker_id}] Trashing the browser and starting a fresh one...")
+        self.close(keep_session=True)
+        try:
+            self._setup_driver()
+            return True
+        except Exception as setup_err:
+            logging.critical(f"Driver restart FAILED: {setup_err}")
+            return False
+
+    def _save_error_screenshot(self, failure_class, keyword, attempt):
+        if not TAKE_SCREENSHOTS_ON_ERROR or not self.driver or failure_class == FAILURE_CAPTCHA: # CAPTCHA check already shot one
+            return
+        try:
+            with self._tab(): self.driver.save_screenshot(f"error_{failure_class}_{keyword.replace(' ','_')}_{attempt}.png")
+        except Exception: pass # Might fail if driver truly borked
+
+    def _check_keyword_once(self, keyword, max_pages):
+        # Use `num` for more results, `hl` (language) and `gl` (geo) for consistency.
+        # Google can still override these.
+        search_url = f"{self.search_base_url}/search?q={urllib.parse.quote_plus(keyword)}&num={RESULTS_PER_PAGE_ESTIMATE * max_pages}&hl={self.language}&gl={self.country}&filter=0&start=0"
+        self._navigate(search_url)
+
+        with self._tab():
+            if self._check_for_captcha():
+                raise CaptchaDetected(page=0)
+            consent_wall = self._on_consent_wall()
+
+        holder = self._session_holder()
+        if consent_wall or not holder.consent_settled:
+            if consent_wall and holder.consent_settled:
+                logging.info(f"[{self.worker_id}] Bounced to Google's consent page (consent cookies expired?). Clicking through.")
+            consent_clicked = self._handle_cookie_consent()
+            holder.consent_settled = True
+            if consent_clicked:
+                self._save_session_state(force=True) # Fresh consent cookies are exactly what we want to keep
+
+        self._poll(lambda driver: driver.find_elements(By.CSS_SELECTOR, RESULTS_CONTAINER_SELECTOR))
+        time.sleep(random.uniform(1.5, 2.5)) # Let things settle
+
+        absolute_rank_counter = 0
+        for page_num_actual in range(1, max_pages + 1): # Actual page we are on
+            logging.info(f"---- Scanning SERP page {page_num_actual} for '{keyword}' ----")
+            with self._tab():
                 if self._check_for_captcha():
-                    return {"keyword": keyword, "rank": "CAPTCHA", "url": "", "title": "", "page": 0, "status": "CAPTCHA"}
-
-                self._handle_cookie_consent(wait)
-
-                WebDriverWait(self.driver, EXPLICIT_WAIT_TIME).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div#search, div.g, div.hlcw0c, div.Gx5Zad"))
-                )
-                time.sleep(random.uniform(1.5, 2.5)) # Let things settle
-
-                absolute_rank_counter = 0
-                found_on_page = 0
-                for page_num_actual in range(1, max_pages + 1): # Actual page we are on
-                    logging.info(f"---- Scanning SERP page {page_num_actual} for '{keyword}' ----")
-                    if self._check_for_captcha():
-                         return {"keyword": keyword, "rank": "CAPTCHA", "url": "", "title": "", "page": page_num_actual, "status": "CAPTCHA"}
-
-                    page_results = self._extract_search_results()
-
-                    for result_item in page_results:
-                        absolute_rank_counter += 1
-                        link_domain = self._normalize_url(result_item.get("url"))
-
-                        if self.target_domain in link_domain:
-                            logging.info(f"🎉 BINGO! Found '{self.target_domain}' for '{keyword}'!")
-                            logging.info(f"Rank: {absolute_rank_counter}, Title: '{result_item.get('title')}', URL: {result_item.get('url')}")
-                            return {"keyword": keyword, "rank": absolute_rank_counter, "url": result_item.get("url"),
-                                    "title": result_item.get("title"), "page": page_num_actual, "status": "Found"}
-
-                    if page_num_actual < max_pages:
-                        logging.debug(f"Target not on page {page_num_actual}. Trying next page...")
-                        if self._click_next_page(wait):
-                            time.sleep(random.uniform(RANDOM_DELAY_BETWEEN_PAGES[0], RANDOM_DELAY_BETWEEN_PAGES[1]))
-                        else:
-                            logging.info(f"No 'Next' button from page {page_num_actual} for '{keyword}'. Guess that's it.")
-                            break
-                    else:
-                        logging.info(f"Hit max pages ({max_pages}) for '{keyword}'.")
-
-                logging.info(f"Domain '{self.target_domain}' NOT FOUND for '{keyword}' in top {absolute_rank_counter} results (checked {max_pages} pages).")
-                return {"keyword": keyword, "rank": f"Not Found in top {absolute_rank_counter}", "url": "", "title": "", "page": max_pages, "status": "Not Found"}
-
-            except TimeoutException as e:
-                logging.warning(f"Timeout on attempt {attempt + 1} for '{keyword}': {e}")
-                if TAKE_SCREENSHOTS_ON_ERROR: self.driver.save_screenshot(f"error_timeout_{keyword.replace(' ','_')}_{attempt}.png")
-            except WebDriverException as e:
-                logging.error(f"WebDriver busted on attempt {attempt + 1} for '{keyword}': {type(e).__name__} - {e}")
-                if TAKE_SCREENSHOTS_ON_ERROR: self.driver.save_screenshot(f"error_webdriver_{keyword.replace(' ','_')}_{attempt}.png")
-                if "session id is null" in str(e).lower() or "target window already closed" in str(e).lower():
-                    logging.error("Browser probably crashed. Attempting driver restart...")
-                    self.close()
-                    try: self._setup_driver()
-                    except Exception as setup_err:
-                         logging.critical(f"Driver restart FAILED: {setup_err}")
-                         return {"keyword": keyword, "rank": "Error - Driver Crash, Restart Fail", "url": "", "title": "", "page": 0, "status": "Error"}
-            except Exception as e:
-                logging.error(f"Unexpected screw-up on attempt {attempt + 1} for '{keyword}': {type(e).__name__} - {e}", exc_info=False)
-                if TAKE_SCREENSHOTS_ON_ERROR and self.driver:
-                     try: self.driver.save_screenshot(f"error_unexpected_{keyword.replace(' ','_')}_{attempt}.png")
-                     except: pass # Might fail if driver truly borked
-
-            if attempt >= retries: # This was the last retry
-                logging.error(f"Max retries ({retries}) hit for '{keyword}'. Giving up on this one.")
-                error_status = "Error - Max Retries (Timeout)" if isinstance(e, TimeoutException) else \
-                               "Error - Max Retries (WebDriver)" if isinstance(e, WebDriverException) else \
-                               "Error - Max Retries (Unexpected)"
-                return {"keyword": keyword, "rank": error_status, "url": "", "title": "", "page": 0, "status": "Error"}
-        # Should not be reached if logic is correct for retries
-        return {"keyword": keyword, "rank": "Error - Logic Flaw in Retries", "url": "", "title": "", "page": 0, "status": "Error"}
-
-
-    def close(self):
-        if self.driver:
+                    raise CaptchaDetected(page=page_num_actual)
+                page_results = self._extract_search_results()
+                serp_is_empty = not page_results and page_num_actual == 1 and self.driver.execute_script(EMPTY_SERP_JS)
+            if not page_results and page_num_actual == 1:
+                if not serp_is_empty:
+                    # There's stuff on page 1 and none of our selectors matched it, so they're what failed.
+                    raise ParseMiss(f"No results extracted from page 1 for '{keyword}'")
+                logging.info(f"Google has zero results for '{keyword}'. Nothing to rank in.")
+                break
+
+            for result_item in page_results:
+                absolute_rank_counter += 1
+                link_domain = self._normalize_url(result_item.get("url"))
+
+                if self.target_domain in link_domain:
+                    logging.info(f"🎉 BINGO! Found '{self.target_domain}' for '{keyword}'!")
+                    logging.info(f"Rank: {absolute_rank_counter}, Title: '{result_item.get('title')}', URL: {result_item.get('url')}")
+                    return {"keyword": keyword, "rank": absolute_rank_counter, "url": result_item.get("url"),
+                            "title": result_item.get("title"), "page": page_num_actual, "status": "Found", "failure_class": None}
+
+            if page_num_actual < max_pages:
+                logging.debug(f"Target not on page {page_num_actual}. Trying next page...")
+                if self._click_next_page():
+                    time.sleep(random.uniform(RANDOM_DELAY_BETWEEN_PAGES[0], RANDOM_DELAY_BETWEEN_PAGES[1]))
+                else:
+                    logging.info(f"No 'Next' button from page {page_num_actual} for '{keyword}'. Guess that's it.")
+                    break
+            else:
+                logging.info(f"Hit max pages ({max_pages}) for '{keyword}'.")
+
+        logging.info(f"Domain '{self.target_domain}' NOT FOUND for '{keyword}' in top {absolute_rank_counter} results (checked {max_pages} pages).")
+        return {"keyword": keyword, "rank": f"Not Found in top {absolute_rank_counter}", "url": "", "title": "",
+                "page": max_pages, "status": "Not Found", "failure_class": None}
+
+    def get_rank_for_keyword(self, keyword, max_pages=3, retries=None):
+        # `retries` caps the total retries across all failure classes; None = just follow RETRY_POLICIES.
+        self._before_keyword()
+        try:
+            return self._get_rank_with_retries(keyword, max_pages, retries)
+        finally:
+            self._after_keyword()
+
+    def _driver_missing(self):
+        return not self.driver
+
+    def _revive_driver(self):
+        # An earlier restart/recycle failed and left us with no Chrome. Keep trying (with backoff) before giving up.
+        policy = RETRY_POLICIES[FAILURE_DRIVER_CRASH]
+        for attempt in range(1, policy["retries"] + 2):
+            logging.warning(f"[{self.worker_id}] Browser driver's MIA. Trying to bring one back (attempt {attempt})...")
+            if self._restart_driver(FAILURE_DRIVER_CRASH):
+                return True
+            if attempt > policy["retries"]:
+                break
+            backoff = random.uniform(*policy["backoff"]) * attempt
+            if self.cancel_check.wait(backoff):
+                break
+            self.retry_stats.record_failure(FAILURE_DRIVER_CRASH, 0.0, backoff_seconds=backoff)
+        return False
+
+    def _get_rank_with_retries(self, keyword, max_pages, retries):
+        if self._driver_missing() and not self._revive_driver():
+            logging.error("Browser driver's MIA and won't come back. Can't search.")
+            return self._failure_result(keyword, FAILURE_DRIVER_CRASH, rank="Error - No Driver")
+
+        failures_by_class = collections.Counter()
+        for attempt in range(1, sum(p["retries"] for p in RETRY_POLICIES.values()) + 2):
+            self._wait_out_circuit_breaker()
+            if self.cancel_check.is_set():
+                return self._cancelled_result(keyword)
+            attempt_started = time.monotonic()
             try:
-                self.driver.quit()
-                logging.info("Browser shut down. Peace out.")
+                logging.info(f"🔍 [{self.worker_id}] Hunting for '{keyword}' (Attempt {attempt})")
+                result = self._check_keyword_once(keyword, max_pages)
+                self.circuit_breaker.record_success(self.breaker_key)
+                self._save_session_state()
+                return result
+            except CheckCancelled:
+                return self._cancelled_result(keyword)
             except Exception as e:
-                logging.warning(f"Problem closing browser: {e}")
+                failure_class = classify_failure(e)
+                wasted = time.monotonic() - attempt_started
+                failed_page = getattr(e, "page", 0)
+                failures_by_class[failure_class] += 1
+                log = logging.error if failure_class in (FAILURE_DRIVER_CRASH, FAILURE_UNEXPECTED) else logging.warning
+                log(f"[{self.worker_id}] Attempt {attempt} for '{keyword}' failed [{failure_class}]: {type(e).__name__} - {e}")
+                self._save_error_screenshot(failure_class, keyword, attempt)
+                if failure_class == FAILURE_CAPTCHA:
+                    self.circuit_breaker.record_captcha(self.breaker_key)
+                    self._discard_session_state()
+
+            policy = RETRY_POLICIES[failure_class]
+            out_of_retries = failures_by_class[failure_class] > policy["retries"] or \
+                             (retries is not None and attempt > retries)
+            if out_of_retries:
+                self.retry_stats.record_failure(failure_class, wasted, gave_up=True)
+                logging.error(f"Out of '{failure_class}' retries for '{keyword}'. Giving up on this one.")
+                return self._failure_result(keyword, failure_class, page=failed_page)
+
+            if self.cancel_check.is_set():
+                self.retry_stats.record_failure(failure_class, wasted, gave_up=True)
+                return self._cancelled_result(keyword)
+            backoff = random.uniform(*policy["backoff"]) * failures_by_class[failure_class]
+            logging.info(f"Retrying '{keyword}' after a {backoff:.1f}s nap ({failure_class} policy)...")
+            if self.cancel_check.wait(backoff): # Wakes up early if the other copy answers mid-nap
+                self.retry_stats.record_failure(failure_class, wasted, gave_up=True)
+                return self._cancelled_result(keyword)
+            self.retry_stats.record_failure(failure_class, wasted, backoff_seconds=backoff)
+            if (policy["restart_driver"] or self._driver_missing()) and not self._restart_driver(failure_class):
+                return self._failure_result(keyword, failure_class, rank="Error - Driver Crash, Restart Fail")
+        # Should not be reached: every class runs out of retries before the attempt budget does
+        return self._failure_result(keyword, FAILURE_UNEXPECTED, rank="Error - Logic Flaw in Retries")
+
+
+    def close(self, keep_session=False):
+        # keep_session=True for restarts/recycles: the next Chrome gets the same warm profile back
+        with self._driver_lock: # Never quit out from under a driver command another thread is running
+            if self.driver:
+                try:
+                    self.driver.quit()
+                    logging.info("Browser shut down. Peace out.")
+                except Exception as e:
+                    logging.warning(f"Problem closing browser: {e}")
+                self.driver = None
+        if not keep_session and self.session_profile and self.session_store:
+            self.session_store.release(self.session_profile)
+            self.session_profile = None
+
+class TabbedBrowser(GoogleRankTracker):
+    """One Chrome, many tabs. Doesn't check anything itself; hands out TabWorkers that share its driver."""
+    implicit_wait = 0 # An implicit wait would hold the driver lock hostage while other tabs queue up
+
+    def __init__(self, *args, **kwargs):
+        self._checks_idle = threading.Condition()
+        self._checks_in_flight = 0
+        self._recycle_pending = None
+        super().__init__(*args, **kwargs)
+
+    def _get_webdriver_options(self):
+        chrome_options = super()._get_webdriver_options()
+        chrome_options.page_load_strategy = "none" # Don't block the shared session on one tab's page load
+        return chrome_options
+
+    def open_tabs(self, num_tabs):
+        return [TabWorker(self, worker_id=f"{self.worker_id}-tab{tab_num + 1}") for tab_num in range(num_tabs)]
+
+    def _begin_tab_check(self):
+        # A recycle waits for every tab to finish its current keyword; new keywords queue up behind it
+        with self._checks_idle:
+            reason = self.lifecycle.recycle_reason(self) if self.driver else None
+            if reason and not self._recycle_pending:
+                self._recycle_pending = reason
+            while self._recycle_pending and self._checks_in_flight:
+                self._checks_idle.wait()
+            if self._recycle_pending:
+                with self._driver_lock:
+                    self._recycle_driver(self._recycle_pending) # Tabs reopen themselves on their next _tab()
+                self._recycle_pending = None
+                self._checks_idle.notify_all()
+            self._checks_in_flight += 1
+
+    def _end_tab_check(self):
+        with self._checks_idle:
+            self._checks_in_flight -= 1
+            self._after_keyword() # Counted per browser: that's what's getting bloated
+            self._checks_idle.notify_all()
+
+
+class TabWorker(GoogleRankTracker):
+    """Runs checks in its own tab of a TabbedBrowser, side by side with its sibling tabs.
+
+    Driver calls take turns through the browser's lock (switching tabs as needed), while page loads,
+    polling naps and between-page delays overlap across tabs. That overlap is the whole point.
+    """
+    def __init__(self, browser, worker_id):
+        self.browser = browser
+        self.handle = None
+        self._tab_generation = None
+        super().__init__(driver_path=browser.driver_path, target_domain=browser.target_domain,
+                         user_agent=browser.user_agent, proxy=browser.proxy, worker_id=worker_id,
+                         circuit_breaker=browser.circuit_breaker, retry_stats=browser.retry_stats,
+                         search_base_url=browser.search_base_url, lifecycle=browser.lifecycle,
+                         language=browser.language, country=browser.country) # No session_store: cookies are browser-wide, the browser owns the profile
+        self.breaker_key = browser.breaker_key # Same Chrome, same IP, same CAPTCHA fate
+        self._driver_lock = browser._driver_lock
+
+    def _setup_driver(self):
+        with self.browser._driver_lock:
+            if not self.browser.driver:
+                raise WebDriverException("Shared browser is gone, can't open a tab in it.")
+            self.driver = self.browser.driver
+            self.driver.switch_to.new_window("tab")
+            self.handle = self.driver.current_window_handle
+            self.browser._active_handle = self.handle
+            self._tab_generation = self.browser.driver_generation
+            logging.info(f"[{self.worker_id}] Opened a tab in the shared browser.")
+
+    @contextlib.contextmanager
+    def _tab(self, fresh_page=False):
+        # fresh_page: the caller is about to load a new page anyway, so a tab lost to a browser restart can just be reopened
+        with self.browser._driver_lock:
+            if self._tab_generation != self.browser.driver_generation: # Browser got restarted under us
+                if not fresh_page:
+                    # Mid-check: the SERP we were on is gone, so carrying on would scan a blank tab
+                    raise WebDriverException("Shared browser got restarted mid-check, no such window anymore.")
+                self._setup_driver()
+            if self.browser._active_handle != self.handle:
+                self.driver.switch_to.window(self.handle)
+                self.browser._active_handle = self.handle
+            yield
+
+    def _session_holder(self):
+        return self.browser
+
+    def _driver_missing(self):
+        return not self.driver or not self.browser.driver
+
+    def _before_keyword(self):
+        self.browser._begin_tab_check()
+
+    def _after_keyword(self):
+        self.browser._end_tab_check()
+
+    def _navigate(self, url):
+        # driver.get() would park the whole session until this tab finishes loading
+        with self._tab(fresh_page=True):
+            self.driver.execute_script(STALE_PAGE_MARKER_JS + " window.location.href = arguments[0];", url)
+        self._wait_for_page_ready()
+
+    def _restart_driver(self, failure_class=None):
+        with self.browser._driver_lock:
+            if self.browser.driver and self._tab_generation != self.browser.driver_generation:
+                return True # A sibling already restarted the browser; our next _tab() opens a fresh tab in it
+            if failure_class == FAILURE_CAPTCHA:
+                # Cookies and IP are browser-wide, so a new tab would walk straight back into the CAPTCHA
+                logging.warning(f"[{self.worker_id}] CAPTCHA burns the whole browser, restarting it for every tab...")
+                return self.browser._restart_driver(failure_class)
+            try:
+                handles = self.browser.driver.window_handles if self.browser.driver else []
+            except WebDriverException:
+                handles = []
+            if not handles:
+                logging.error(f"[{self.worker_id}] Shared browser is dead, restarting it for every tab...")
+                return self.browser._restart_driver(failure_class) # Sibling tabs reopen themselves on their next _tab()
+            logging.info(f"[{self.worker_id}] Swapping this tab for a fresh one...")
+            old_handle = self.handle
+            try:
+                # New Window needs a live window as the current context, so open the new tab before closing the old one
+                self.browser.driver.switch_to.window(old_handle if old_handle in handles else handles[0])
+                self._setup_driver()
+                if old_handle in handles:
+                    self.driver.switch_to.window(old_handle)
+                    self.driver.close()
+                    self.driver.switch_to.window(self.handle)
+                return True
+            except Exception as setup_err:
+                logging.critical(f"Tab reopen FAILED: {setup_err}")
+                return False
+
+    def close(self, keep_session=False):
+        with self.browser._driver_lock:
+            if self.driver and self._tab_generation == self.browser.driver_generation:
+                try:
+                    self.driver.switch_to.window(self.handle)
+                    self.driver.close()
+                except Exception as e:
+                    logging.warning(f"Problem closing tab: {e}")
+                self.browser._active_handle = None
             self.driver = None
 
+
+def build_session_store():
+    """The one SessionStateStore a run shares between all its workers. None if warm sessions are off."""
+    if not SESSION_STATE_DIR:
+        return None
+    return SessionStateStore(SESSION_STATE_DIR, max_age_hours=SESSION_PROFILE_MAX_AGE_HOURS,
+                             profiles_per_locale=SESSION_PROFILES_PER_LOCALE)
+
+
+def start_trackers(num_browsers, tabs_per_browser=1, worker_prefix="worker", **tracker_kwargs):
+    """Fires up `num_browsers` Chromes (split into tabs if `tabs_per_browser` > 1). Returns (browsers, trackers)."""
+    browsers, trackers = [], []
+    try:
+        for worker_num in range(num_browsers):
+            browser_class = TabbedBrowser if tabs_per_browser > 1 else GoogleRankTracker
+            browsers.append(browser_class(proxy=PROXIES[worker_num % len(PROXIES)] if PROXIES else None,
+                                          worker_id=f"{worker_prefix}-{worker_num + 1}",
+                                          **tracker_kwargs))
+            trackers.extend(browsers[-1].open_tabs(tabs_per_browser) if tabs_per_browser > 1 else browsers[-1:])
+    except BaseException: # Incl. Ctrl+C halfway through: don't leave orphaned Chromes behind
+        for tracker in trackers + browsers:
+            tracker.close()
+        raise
+    return browsers, trackers
+
+
+def _paced_check(tracker, keyword, max_pages, pace=True):
+    if pace and tracker.last_check_finished_at is not None:
+        # The gap between keywords is what matters, so time spent idle (e.g. in the service) counts towards it
+        delay = random.uniform(RANDOM_DELAY_BETWEEN_KEYWORDS[0], RANDOM_DELAY_BETWEEN_KEYWORDS[1])
+        delay -= time.monotonic() - tracker.last_check_finished_at
+        if delay > 0:
+            logging.info(f"[{tracker.worker_id}] Chilling for {delay:.1f}s before next keyword...")
+            time.sleep(delay)
+    tracker.check_started_at = time.monotonic() # Hedging clock starts here, the nap above doesn't count
+    try:
+        result = tracker.get_rank_for_keyword(keyword, max_pages=max_pages)
+    finally:
+        tracker.check_started_at = None
+        tracker.last_check_finished_at = time.monotonic()
+    tracker.checks_done += 1
+    result['timestamp_executed'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    result['worker_id'] = tracker.worker_id
+    return result
+
+def run_keyword_checks(trackers, keywords, max_pages, hedge_after=None, on_result=None):
+    """Spreads keywords over a pool of trackers, one thread each.
+
+    With `hedge_after` set, a check that's still running after that many seconds gets reissued
+    on an idle tracker and whichever copy comes back with a real answer first wins. The loser is told
+    to stop and bails at its next wait, well before it would've worked through its retries.
+    """
+    idle = list(trackers)
+    pending = collections.deque(keywords)
+    in_flight = {} # future -> (keyword, tracker, is_hedge)
+    results, fallbacks, hedged = {}, {}, set()
+    retry_stats = trackers[0].retry_stats
+
+    def settle(keyword, result):
+        results[keyword] = result
+        for other_keyword, other_tracker, _ in in_flight.values():
+            if other_keyword == keyword:
+                other_tracker.cancel_check.set()
+        logging.info(f"Result for '{keyword}': Rank {result.get('rank', 'N/A')}, Status: {result.get('status', 'N/A')}")
+        if on_result:
+            on_result(result)
+
+    def unsettled():
+        return pending or any(keyword not in results for keyword, *_ in in_flight.values())
+
+    pool = ThreadPoolExecutor(max_workers=len(trackers))
+    try:
+        while unsettled():
+            while idle and pending:
+                keyword = pending.popleft()
+                tracker = idle.pop(0)
+                tracker.cancel_check.clear()
+                in_flight[pool.submit(_paced_check, tracker, keyword, max_pages)] = (keyword, tracker, False)
+
+            if hedge_after is not None and idle:
+                now = time.monotonic()
+                for keyword, busy_tracker, is_hedge in list(in_flight.values()):
+                    if not idle:
+                        break
+                    started_at = busy_tracker.check_started_at
+                    if is_hedge or keyword in hedged or started_at is None or now - started_at < hedge_after:
+                        continue
+                    tracker = idle.pop(0)
+                    tracker.cancel_check.clear()
+                    hedged.add(keyword)
+                    retry_stats.record_hedge()
+                    logging.info(f"'{keyword}' is dragging ({now - started_at:.0f}s). Hedging it on {tracker.worker_id}.")
+                    in_flight[pool.submit(_paced_check, tracker, keyword, max_pages, pace=False)] = (keyword, tracker, True)
+
+            done, _ = wait(in_flight, timeout=1.0 if hedge_after is not None else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                keyword, tracker, is_hedge = in_flight.pop(future)
+                idle.append(tracker)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"[{tracker.worker_id}] Check for '{keyword}' blew up: {type(e).__name__} - {e}")
+                    result = tracker._failure_result(keyword, FAILURE_UNEXPECTED)
+                if keyword in results:
+                    continue # The other copy already answered
+                still_running = any(k == keyword for k, *_ in in_flight.values())
+                if result['status'] in ("Found", "Not Found") or not still_running:
+                    if is_hedge and result['status'] in ("Found", "Not Found"):
+                        retry_stats.record_hedge(won=True)
+                    settle(keyword, result)
+                else:
+                    fallbacks[keyword] = result # Hold the error, the other copy might still come through
+        if in_flight: # Only cancelled losers left. Let them bail out before anyone closes their Chrome.
+            _, stuck = wait(in_flight, timeout=EXPLICIT_WAIT_TIME)
+            for future in stuck:
+                logging.warning(f"[{in_flight[future][1].worker_id}] Cancelled check still hasn't stopped, moving on without it.")
+    finally:
+        pool.shutdown(wait=False)
+    return [results.get(keyword) or fallbacks[keyword] for keyword in keywords]
+
 def save_results_to_files(results_df, base_filename_prefix):
     if results_df.empty:
         logging.info("No data to save. Bummer.")
@@ -337,23 +1092,37 @@ if __name__ == "__main__":
     logging.info(f"Keywords on the hit list: {len(KEYWORDS_TO_TRACK)}")
     logging.info(f"Max SERP pages per keyword: {MAX_PAGES_TO_CHECK}")
 
+    keywords_this_run = KEYWORDS_TO_TRACK
+    if USE_SCHEDULER:
+        schedule = build_check_schedule(load_result_history(OUTPUT_FILENAME_PREFIX), KEYWORDS_TO_TRACK, TARGET_DOMAIN,
+                                        MAX_PAGES_TO_CHECK, results_per_page=RESULTS_PER_PAGE_ESTIMATE,
+                                        priorities=KEYWORD_PRIORITIES, request_budget=RUN_REQUEST_BUDGET,
+                                        min_interval_days=MIN_CHECK_INTERVAL_DAYS,
+                                        max_interval_days=MAX_CHECK_INTERVAL_DAYS)
+        log_schedule_coverage(schedule)
+        keywords_this_run = schedule.loc[schedule['selected'], 'keyword'].tolist()
+
     all_results_data = []
-    tracker_instance = None
+    browsers, trackers = [], []
+    circuit_breaker = CircuitBreaker()
+    retry_stats = RetryStats()
+    lifecycle = DriverLifecycle()
+    session_store = build_session_store()
 
     try:
-        tracker_instance = GoogleRankTracker(driver_path=CHROME_DRIVER_PATH,
-                                             target_domain=TARGET_DOMAIN)
-        for i, keyword in enumerate(KEYWORDS_TO_TRACK):
-            result = tracker_instance.get_rank_for_keyword(keyword, max_pages=MAX_PAGES_TO_CHECK, retries=1)
-            result['timestamp_executed'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            result['target_domain_checked'] = TARGET_DOMAIN
-            all_results_data.append(result)
-            logging.info(f"Result for '{keyword}': Rank {result.get('rank', 'N/A')}, Status: {result.get('status', 'N/A')}")
-
-            if i < len(KEYWORDS_TO_TRACK) - 1:
-                delay = random.uniform(RANDOM_DELAY_BETWEEN_KEYWORDS[0], RANDOM_DELAY_BETWEEN_KEYWORDS[1])
-                logging.info(f"Chilling for {delay:.1f}s before next keyword...")
-                time.sleep(delay)
+        # No point firing up Chrome if nothing's due
+        tabs_per_browser = max(1, TABS_PER_BROWSER)
+        num_browsers = min(max(1, NUM_WORKERS), -(-len(keywords_this_run) // tabs_per_browser))
+        browsers, trackers = start_trackers(num_browsers, tabs_per_browser,
+                                            driver_path=CHROME_DRIVER_PATH,
+                                            target_domain=TARGET_DOMAIN,
+                                            circuit_breaker=circuit_breaker,
+                                            retry_stats=retry_stats,
+                                            lifecycle=lifecycle,
+                                            session_store=session_store)
+        if keywords_this_run:
+            run_keyword_checks(trackers, keywords_this_run, MAX_PAGES_TO_CHECK,
+                               hedge_after=HEDGE_AFTER_SECONDS, on_result=all_results_data.append)
     except KeyboardInterrupt:
         logging.warning("User pulled the plug (Ctrl+C). Shutting down.")
     except WebDriverException as e:
@@ -361,13 +1130,18 @@ if __name__ == "__main__":
     except Exception as e:
         logging.critical(f"Something went sideways in the main block: {e}", exc_info=True)
     finally:
-        if tracker_instance:
-            tracker_instance.close()
+        for tracker in trackers + browsers: # Tabs first, then the browsers they live in
+            tracker.close()
+
+        # Read the history before this run's CSV lands next to it, or the report would count this run twice
+        history = load_result_history(OUTPUT_FILENAME_PREFIX) if BUILD_TAG_REPORT else None
 
         logging.info("\n--- FINAL SCORE ---")
         if all_results_data:
             results_df = pd.DataFrame(all_results_data)
-            column_order = ['timestamp_executed', 'keyword', 'target_domain_checked', 'rank', 'status', 'url', 'title', 'page']
+            results_df['target_domain_checked'] = TARGET_DOMAIN
+            column_order = ['timestamp_executed', 'keyword', 'target_domain_checked', 'rank', 'status', 'failure_class',
+                            'url', 'title', 'page', 'worker_id']
             results_df = results_df.reindex(columns=column_order, fill_value='')
             # For console output, can be a bit much for many keywords
             # pd.set_option('display.max_rows', None); pd.set_option('display.max_colwidth', None); pd.set_option('display.width', 120)
@@ -375,4 +1149,28 @@ if __name__ == "__main__":
             save_results_to_files(results_df, OUTPUT_FILENAME_PREFIX)
         else:
             logging.info("Welp, no results were gathered.")
+            results_df = None
+
+        if BUILD_TAG_REPORT:
+            try:
+                tag_report = build_rank_report(history, current=results_df,
+                                               keyword_tags=KEYWORD_TAGS, freq=REPORT_PERIOD)
+                log_rank_report(tag_report)
+                save_results_to_files(tag_report, REPORT_FILENAME_PREFIX)
+            except Exception as e:
+                logging.error(f"Tag report blew up: {e}", exc_info=True)
+
+        retry_summary = retry_stats.summary()
+        if not retry_summary.empty:
+            logging.info(f"\n--- RETRY OVERHEAD BY FAILURE CLASS ---\n{retry_summary.to_string(index=False)}")
+        if lifecycle.recycles:
+            logging.info(f"Chrome recycles by reason: {dict(lifecycle.recycles)}")
+        memory_curve = lifecycle.memory_curve()
+        if memory_curve['rss_mb'].notna().any():
+            logging.info(f"Chrome memory per worker (MB): "
+                         f"{memory_curve.groupby('worker_id')['rss_mb'].agg(['min', 'max', 'last']).round(0).to_dict('index')}")
+        if MEMORY_LOG_FILENAME_PREFIX and not memory_curve.empty:
+            save_results_to_files(memory_curve, MEMORY_LOG_FILENAME_PREFIX)
+        if retry_stats.hedges_issued:
+            logging.info(f"Hedged checks: {retry_stats.hedges_issued} issued, {retry_stats.hedges_won} won by the hedge.")
         logging.info("--- Bot signing off. ---")
@@ -0,0 +1,49 @@
+# rank_history.py
+# Reads the CSV reports google_rank_tracker.py leaves behind, so later runs can learn from earlier ones.
+
+import glob
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+NOT_FOUND_RANK = 101 # Sentinel for "Not Found in top N": worse than anything Google will ever show us
+HISTORY_COLUMNS = ['timestamp_executed', 'keyword', 'target_domain_checked', 'rank', 'status']
+
+
+def parse_rank_column(ranks):
+    """Turns the mixed `rank` column (1, "7", "Not Found in top 20", "CAPTCHA", "Error - ...") into floats.
+
+    Not-found rows get NOT_FOUND_RANK, errors/CAPTCHAs get NaN (they tell us nothing about the rank).
+    Only the distinct values get parsed, then broadcast back, so a million rows is no sweat.
+    """
+    codes, uniques = pd.factorize(pd.Series(ranks, copy=False))
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.to_numeric(uniques, errors='coerce').to_numpy(dtype=float, copy=True)
+    parsed[uniques.astype(str).str.startswith("Not Found").to_numpy()] = NOT_FOUND_RANK
+    return np.append(parsed, np.nan)[codes] # Code -1 (missing rank) lands on the trailing NaN
+
+
+def load_result_history(prefix="google_rank_report", directory="."):
+    """Loads every `<prefix>_*.csv` report in `directory` into one DataFrame with a numeric `rank_num`."""
+    report_files = sorted(glob.glob(os.path.join(directory, f"{prefix}_*.csv")))
+    frames = []
+    for report_file in report_files:
+        try:
+            frames.append(pd.read_csv(report_file, usecols=lambda col: col in HISTORY_COLUMNS,
+                                      dtype={'rank': object}, encoding='utf-8-sig'))
+        except Exception as e:
+            logging.warning(f"Couldn't read past report '{report_file}', skipping it: {e}")
+    if not frames:
+        logging.info(f"No past reports matching '{prefix}_*.csv' yet. Starting from scratch.")
+        # Typed, so date math downstream works the same on a first run as on the hundredth
+        return pd.DataFrame({'timestamp_executed': pd.Series(dtype='datetime64[ns]'),
+                             **{col: pd.Series(dtype=object) for col in HISTORY_COLUMNS[1:]},
+                             'rank_num': pd.Series(dtype=float)})
+
+    history = pd.concat(frames, ignore_index=True).reindex(columns=HISTORY_COLUMNS)
+    history['timestamp_executed'] = pd.to_datetime(history['timestamp_executed'], errors='coerce')
+    history['rank_num'] = parse_rank_column(history['rank'])
+    logging.info(f"Loaded {len(history)} past results from {len(frames)} report file(s).")
+    return history
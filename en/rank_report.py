@@ -0,0 +1,126 @@
+# rank_report.py
+# Client-style rank reports (avg position, visibility, top-3/top-10 share, gains/losses) per keyword tag.
+# Everything is whole-column pandas/NumPy work, no row loops, so years of history still crunch in seconds.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from rank_history import NOT_FOUND_RANK, parse_rank_column
+
+# Rough organic CTR by position (1..20). Only the shape matters: visibility is reported as % of "all #1s".
+CTR_BY_POSITION = np.array([0.285, 0.157, 0.110, 0.080, 0.072, 0.051, 0.040, 0.032, 0.028, 0.025,
+                            0.012, 0.011, 0.010, 0.009, 0.008, 0.007, 0.006, 0.006, 0.005, 0.005])
+ALL_KEYWORDS_TAG = "(all)"
+UNTAGGED_TAG = "(untagged)"
+GROUP_KEYS = ['target_domain_checked', 'tag', 'period']
+
+
+def build_tag_table(keyword_tags):
+    """{"keyword": ["tag", ...]} -> one (keyword, tag) row per pair, ready to merge."""
+    pairs = [(keyword, tag) for keyword, tags in (keyword_tags or {}).items()
+             for tag in ([tags] if isinstance(tags, str) else tags)]
+    return pd.DataFrame(pairs, columns=['keyword', 'tag'])
+
+
+def visibility_weights(rank_num):
+    """Expected CTR for each rank. Not found, errors and anything past the curve count as zero."""
+    lookup = np.concatenate(([0.0], CTR_BY_POSITION, [0.0]))
+    positions = np.nan_to_num(np.asarray(rank_num, dtype=float), nan=0.0).astype(np.int64)
+    return lookup[np.clip(positions, 0, len(lookup) - 1)]
+
+
+def period_snapshots(results, freq="W", max_carry_periods=5):
+    """One rank per (domain, keyword, period): the last good check in that period.
+
+    Keywords the scheduler skipped in a period carry their last known rank forward for up to
+    `max_carry_periods` periods, so stable keywords don't vanish from weekly numbers.
+    """
+    results = results.copy()
+    results['timestamp_executed'] = pd.to_datetime(results['timestamp_executed'], errors='coerce')
+    # History comes pre-parsed, fresh results don't: only parse what's missing
+    unparsed = results['rank_num'].isna() if 'rank_num' in results else pd.Series(True, index=results.index)
+    results.loc[unparsed, 'rank_num'] = parse_rank_column(results.loc[unparsed, 'rank'])
+    results = results[results['rank_num'].notna() & results['timestamp_executed'].notna()]
+    if results.empty: # Nothing but errors/CAPTCHAs so far: no ranks to snapshot
+        return pd.DataFrame(columns=['target_domain_checked', 'keyword', 'period', 'rank_num',
+                                     'carried_forward', 'rank_change'])
+    results = results.assign(period=results['timestamp_executed'].dt.to_period(freq).dt.start_time)
+
+    last_per_period = (results.sort_values('timestamp_executed')
+                       .drop_duplicates(['target_domain_checked', 'keyword', 'period'], keep='last')
+                       .set_index(['target_domain_checked', 'keyword', 'period'])['rank_num'])
+    grid = last_per_period.unstack('period')
+    checked = grid.notna()
+    grid = grid.ffill(axis=1, limit=max_carry_periods)
+
+    snapshots = grid.stack().dropna().rename('rank_num').to_frame()
+    snapshots['carried_forward'] = ~checked.stack().reindex(snapshots.index).to_numpy()
+    # Positive = climbed. Carried-forward rows compare against themselves, so they show no change.
+    snapshots['rank_change'] = snapshots.groupby(level=[0, 1])['rank_num'].shift() - snapshots['rank_num']
+    return snapshots.reset_index()
+
+
+def build_rank_report(history, current=None, keyword_tags=None, freq="W", max_carry_periods=5):
+    """Aggregates per (domain, tag, period). `current` (this run's results) gets folded into `history`."""
+    # Parse timestamps per frame: history's are already datetimes, this run's are still strings
+    frames = [frame.assign(timestamp_executed=pd.to_datetime(frame['timestamp_executed'], errors='coerce'))
+              for frame in (history, current) if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    results = pd.concat(frames, ignore_index=True)
+    # Hash the strings once here instead of in every dedupe/groupby below
+    results['keyword'] = results['keyword'].astype('category')
+    results['target_domain_checked'] = results['target_domain_checked'].astype('category')
+    results = results.drop_duplicates(['timestamp_executed', 'keyword', 'target_domain_checked'], keep='last')
+
+    snapshots = period_snapshots(results, freq=freq, max_carry_periods=max_carry_periods)
+    if snapshots.empty:
+        return pd.DataFrame()
+    found = snapshots['rank_num'] < NOT_FOUND_RANK
+    snapshots = snapshots.assign(
+        found=found,
+        checked=~snapshots['carried_forward'],
+        found_rank=snapshots['rank_num'].where(found),
+        visibility=visibility_weights(snapshots['rank_num'].where(found)),
+        top3=snapshots['rank_num'] <= 3,
+        top10=snapshots['rank_num'] <= 10,
+        gained=snapshots['rank_change'] > 0,
+        lost=snapshots['rank_change'] < 0,
+    )
+
+    tagged = snapshots.merge(build_tag_table(keyword_tags), on='keyword', how='left')
+    tagged['tag'] = tagged['tag'].fillna(UNTAGGED_TAG)
+    tagged = pd.concat([snapshots.assign(tag=ALL_KEYWORDS_TAG), tagged], ignore_index=True)
+
+    report = tagged.groupby(GROUP_KEYS, sort=True, observed=True).agg(
+        keywords=('keyword', 'size'),
+        checked=('checked', 'sum'),
+        found=('found', 'sum'),
+        avg_position=('found_rank', 'mean'),
+        visibility=('visibility', 'mean'),
+        top3_share=('top3', 'mean'),
+        top10_share=('top10', 'mean'),
+        gains=('gained', 'sum'),
+        losses=('lost', 'sum'),
+        net_positions=('rank_change', 'sum'),
+    )
+    report['visibility'] = report['visibility'] / CTR_BY_POSITION[0] * 100 # % of what all-#1 rankings would get
+    report[['top3_share', 'top10_share']] *= 100
+    return report.round(2).reset_index()
+
+
+def latest_period_report(report):
+    """Just the newest period for each domain/tag, for the console."""
+    if report.empty:
+        return report
+    newest = report.groupby(['target_domain_checked', 'tag'])['period'].transform('max')
+    return report[report['period'] == newest].reset_index(drop=True)
+
+
+def log_rank_report(report):
+    if report.empty:
+        logging.info("No usable ranks for a tag report yet.")
+        return
+    logging.info(f"\n--- TAG REPORT (latest period) ---\n{latest_period_report(report).to_string(index=False)}")
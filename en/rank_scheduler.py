@@ -0,0 +1,102 @@
+# rank_scheduler.py
+# Decides which keywords actually need a fresh check this run, instead of hammering Google for all of them.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+VOLATILITY_WINDOW = 8 # How many recent checks per keyword feed the volatility estimate
+VOLATILITY_SCALE = 2.0 # Avg. positions moved per check that halves the check interval
+UNKNOWN_VOLATILITY = VOLATILITY_SCALE # What we assume when there's only one past check to go on
+BOUNDARY_SCALE = 5.0 # Positions away from a page break where the "close to the edge" penalty wears off
+MIN_BOUNDARY_FACTOR = 0.25
+
+
+def _page_boundary_distance(ranks, results_per_page):
+    """How many positions a rank is from falling onto (or climbing onto) another SERP page."""
+    offset = (ranks - 0.5) % results_per_page
+    distance = np.minimum(offset, results_per_page - offset)
+    # Page 1 has no page above it, so only the drop onto page 2 counts there
+    return np.where(ranks <= results_per_page, results_per_page - offset, distance)
+
+
+def build_check_schedule(history, keywords, target_domain, max_pages, results_per_page=10, priorities=None,
+                         request_budget=None, min_interval_days=1, max_interval_days=30, now=None):
+    """Gives each keyword a check interval and picks the ones that are due, most urgent first.
+
+    The interval starts at `max_interval_days` and shrinks with recent rank volatility, with how close the
+    last rank sits to a page break and with the keyword's business priority. Keywords we've never
+    checked (or only ever errored on) are always due. `request_budget` caps the estimated SERP page
+    loads for the run; due keywords that don't fit are deferred to the next run.
+    """
+    now = now or pd.Timestamp.now()
+    priorities = priorities or {}
+    not_found_cap = max_pages * results_per_page + 1 # Anything we didn't see counts as "just past the last page"
+
+    known = history[(history['target_domain_checked'].astype(str).str.lower() == target_domain.lower())
+                    & history['keyword'].isin(keywords)
+                    & history['rank_num'].notna()
+                    & history['timestamp_executed'].notna()]
+    known = known.sort_values('timestamp_executed').groupby('keyword').tail(VOLATILITY_WINDOW)
+    known = known.assign(rank_capped=known['rank_num'].clip(upper=not_found_cap))
+    known['rank_step'] = known.groupby('keyword')['rank_capped'].diff().abs()
+    per_keyword = known.groupby('keyword').agg(last_checked=('timestamp_executed', 'max'),
+                                               last_rank=('rank_capped', 'last'),
+                                               volatility=('rank_step', 'mean'),
+                                               checks=('rank_capped', 'size'))
+
+    schedule = pd.DataFrame({'keyword': list(dict.fromkeys(keywords))}).merge(
+        per_keyword, left_on='keyword', right_index=True, how='left')
+    schedule['priority'] = schedule['keyword'].map(priorities).fillna(1.0).astype(float)
+    never_checked = schedule['last_checked'].isna()
+
+    stability = 1.0 / (1.0 + schedule['volatility'].fillna(UNKNOWN_VOLATILITY) / VOLATILITY_SCALE)
+    last_rank = schedule['last_rank'].fillna(not_found_cap).to_numpy()
+    boundary = np.clip(_page_boundary_distance(last_rank, results_per_page) / BOUNDARY_SCALE, MIN_BOUNDARY_FACTOR, 1.0)
+    boundary[last_rank >= not_found_cap] = 1.0 # Off the radar entirely, no page break to babysit
+    interval_days = (max_interval_days * stability * boundary / schedule['priority'].clip(lower=0.01))
+    schedule['interval_days'] = interval_days.clip(min_interval_days, max_interval_days).round(2)
+
+    age_days = (now - pd.to_datetime(schedule['last_checked'])).dt.total_seconds() / 86400
+    schedule['age_days'] = age_days.round(2)
+    schedule['due'] = never_checked | (age_days >= schedule['interval_days'])
+    schedule['urgency'] = np.where(never_checked, np.inf, age_days / schedule['interval_days'] * schedule['priority'])
+    # Pages we expect to load: up to the page it ranked on last time, all of them if it wasn't found
+    expected_pages = np.ceil(last_rank / results_per_page)
+    schedule['est_requests'] = np.clip(expected_pages, 1, max_pages).astype(int)
+
+    schedule = schedule.sort_values(['due', 'urgency'], ascending=False, kind='stable').reset_index(drop=True)
+    spent = schedule['est_requests'].where(schedule['due'], 0).cumsum()
+    within_budget = spent <= request_budget if request_budget is not None else True
+    schedule['selected'] = schedule['due'] & within_budget
+    schedule['deferred'] = schedule['due'] & ~schedule['selected']
+    return schedule
+
+
+def schedule_coverage(schedule):
+    """Summarizes what this run covers against the full keyword list."""
+    total = len(schedule)
+    fresh = schedule['selected'] | ~schedule['due'] # Checked now, or last check is still within its interval
+    return {
+        'keywords_total': total,
+        'due': int(schedule['due'].sum()),
+        'selected': int(schedule['selected'].sum()),
+        'deferred_over_budget': int(schedule['deferred'].sum()),
+        'skipped_not_due': int((~schedule['due']).sum()),
+        'est_requests': int(schedule.loc[schedule['selected'], 'est_requests'].sum()),
+        'est_requests_full_run': int(schedule['est_requests'].sum()),
+        'checked_pct': round(100.0 * int(schedule['selected'].sum()) / total, 1) if total else 0.0,
+        'fresh_pct': round(100.0 * int(fresh.sum()) / total, 1) if total else 0.0,
+    }
+
+
+def log_schedule_coverage(schedule):
+    coverage = schedule_coverage(schedule)
+    logging.info(f"Scheduler: {coverage['selected']}/{coverage['keywords_total']} keywords due and picked "
+                 f"({coverage['checked_pct']}% of the list, ~{coverage['est_requests']} of "
+                 f"~{coverage['est_requests_full_run']} page loads a full run would cost).")
+    logging.info(f"Scheduler: {coverage['skipped_not_due']} still fresh, {coverage['deferred_over_budget']} due but "
+                 f"over budget (pushed to next run). {coverage['fresh_pct']}% of the list is fresh after this run.")
+    logging.debug(f"\n{schedule.to_string(index=False)}")
+    return coverage
@@ -0,0 +1,444 @@
+# rank_service.py
+# Rank checks on demand: a long-lived process with warm Chrome workers behind a small local HTTP API.
+#
+#   python rank_service.py                      # real Google, TARGET_DOMAIN from google_rank_tracker.py
+#   python rank_service.py --fixture            # fully offline, against serp_fixture_server.py
+#
+#   POST /checks   {"keyword": "machine learning", "language": "en", "country": "us", "wait": 60}
+#   GET  /checks/<check_id>[?wait=30]
+#   GET  /rank?keyword=machine+learning&language=en&country=us     (submit + wait, one call)
+#   GET  /metrics  queue depth, latency percentiles, cache/coalescing counters, retry overhead
+#   GET  /health
+#
+# Same (keyword, locale, max_pages) asked for while a fetch is already queued or running gets folded into
+# that fetch. Answers younger than SERVICE_CACHE_TTL_S come straight from the cache.
+
+import argparse
+import collections
+import itertools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import google_rank_tracker as grt
+
+# --- SERVICE CONFIG ---
+SERVICE_HOST = "127.0.0.1" # Local only. Don't put this on the internet.
+SERVICE_PORT = 8700
+SERVICE_CACHE_TTL_S = 6 * 3600 # How long a Found/Not Found answer stays good
+SERVICE_MAX_CACHE_ENTRIES = 10000
+SERVICE_MAX_WAIT_S = 300 # Longest a client may block on ?wait=
+SERVICE_MAX_PAGES = 5 # Cap on what clients can ask for
+SERVICE_JOB_HISTORY = 10000 # Finished checks kept around for GET /checks/<id>
+SERVICE_WARM_LOCALES = ["en-us"] # Worker pools started up front; other locales spin up on first request
+SERVICE_ALLOWED_LOCALES = None # e.g. ["en-us", "de-de"]. None = any locale, up to SERVICE_MAX_POOLS of them
+SERVICE_MAX_POOLS = 4 # Every pool is NUM_WORKERS x TABS_PER_BROWSER Chromes that stick around. RAM ain't free.
+# --- END OF SERVICE CONFIG ---
+
+LOCALE_PART = re.compile(r"^[a-z]{2,3}$")
+GOOD_STATUSES = ("Found", "Not Found")
+
+
+class LocaleNotAvailable(Exception):
+    """The locale isn't allowed, or starting it would blow past SERVICE_MAX_POOLS."""
+
+
+class CheckJob:
+    """One actual SERP fetch. Coalesced requests all point at the same job."""
+    _ids = itertools.count(1)
+
+    def __init__(self, keyword, language, country, max_pages):
+        self.check_id = f"chk-{next(self._ids)}"
+        self.keyword = keyword
+        self.language = language
+        self.country = country
+        self.max_pages = max_pages
+        self.status = "queued"
+        self.result = None
+        self.source = "fetch"
+        self.coalesced_requests = 0
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    @property
+    def key(self):
+        return (self.keyword.lower(), self.language, self.country, self.max_pages)
+
+    def to_dict(self):
+        finished_in = self.finished_at - self.submitted_at if self.finished_at else None
+        return {"check_id": self.check_id, "keyword": self.keyword, "language": self.language,
+                "country": self.country, "max_pages": self.max_pages, "status": self.status,
+                "source": self.source, "coalesced_requests": self.coalesced_requests,
+                "latency_s": round(finished_in, 3) if finished_in is not None else None, "result": self.result}
+
+
+class LocalePool:
+    """Warm trackers for one locale, each with its own worker thread pulling from a shared queue.
+
+    The queue exists right away; Chrome starts on a background thread (see `start`), so jobs can
+    queue up while it boots and nobody else has to wait on it.
+    """
+    def __init__(self, service, language, country):
+        self.service = service
+        self.language = language
+        self.country = country
+        self.locale = f"{language}-{country}"
+        self.jobs = queue.Queue()
+        self.busy = 0
+        self.browsers, self.trackers, self.threads = [], [], []
+        self.ready = threading.Event()
+
+    def start(self):
+        try:
+            self.browsers, self.trackers = grt.start_trackers(
+                max(1, grt.NUM_WORKERS), max(1, grt.TABS_PER_BROWSER), worker_prefix=self.locale,
+                **self.service.tracker_kwargs, language=self.language, country=self.country)
+            threads = [threading.Thread(target=self.service._worker_loop, args=(self, tracker),
+                                        name=f"rank-worker-{tracker.worker_id}", daemon=True)
+                       for tracker in self.trackers]
+            for thread in threads:
+                thread.start()
+            self.threads = threads # Only once they're all running, so close() never joins one that isn't
+            logging.info(f"Locale pool '{self.locale}' warmed up with {len(self.trackers)} worker(s).")
+        except Exception as e:
+            logging.error(f"Locale pool '{self.locale}' wouldn't start: {type(e).__name__} - {e}")
+            self.service._pool_failed(self, e)
+        finally:
+            self.ready.set()
+
+    def close(self):
+        self.ready.wait()
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        for tracker in self.trackers + self.browsers:
+            tracker.close()
+
+
+class RankCheckService:
+    def __init__(self, target_domain, search_base_url=None, max_pages=grt.MAX_PAGES_TO_CHECK,
+                 cache_ttl_s=SERVICE_CACHE_TTL_S, allowed_locales=SERVICE_ALLOWED_LOCALES, max_pools=SERVICE_MAX_POOLS):
+        self.default_max_pages = max_pages
+        self.allowed_locales = {locale.lower() for locale in allowed_locales} if allowed_locales is not None else None
+        self.max_pools = max_pools
+        self.cache_ttl_s = cache_ttl_s
+        self.retry_stats = grt.RetryStats()
+        session_store = grt.build_session_store()
+        self.tracker_kwargs = dict(driver_path=grt.CHROME_DRIVER_PATH, target_domain=target_domain,
+                                   search_base_url=search_base_url, circuit_breaker=grt.CircuitBreaker(),
+                                   retry_stats=self.retry_stats, lifecycle=grt.DriverLifecycle(),
+                                   session_store=session_store)
+        self.target_domain = target_domain
+        self._pools = {}
+        self._pool_lock = threading.Lock() # Guards _pools and every put into a pool's queue. Never held while Chrome starts.
+        self._lock = threading.Lock()
+        self._in_flight = {} # job key -> CheckJob still queued/running
+        self._jobs = collections.OrderedDict() # check_id -> CheckJob, oldest first
+        self._cache = collections.OrderedDict() # job key -> (result, stored_at), LRU order
+        self._latencies = collections.deque(maxlen=1000)
+        self._counters = collections.Counter()
+        self.started_at = time.monotonic()
+
+    def pool_for(self, language, country):
+        """The pool for a locale, creating it (and booting its Chrome in the background) on first use."""
+        locale = f"{language}-{country}"
+        with self._pool_lock:
+            return self._pool_for_locked(locale, language, country)
+
+    def _admit_locked(self, locale):
+        if self.allowed_locales is not None and locale not in self.allowed_locales:
+            raise LocaleNotAvailable(f"Locale '{locale}' isn't served here. Try one of: {', '.join(sorted(self.allowed_locales))}.")
+        if locale not in self._pools and len(self._pools) >= self.max_pools:
+            raise LocaleNotAvailable(f"Already running {len(self._pools)} locale pools ({', '.join(sorted(self._pools))}), "
+                                     f"that's the limit.")
+
+    def _pool_for_locked(self, locale, language, country):
+        pool = self._pools.get(locale)
+        if pool is None:
+            self._admit_locked(locale)
+            pool = self._pools[locale] = LocalePool(self, language, country)
+            threading.Thread(target=pool.start, name=f"rank-pool-{locale}", daemon=True).start()
+        return pool
+
+    def _enqueue(self, job):
+        with self._pool_lock:
+            self._pool_for_locked(f"{job.language}-{job.country}", job.language, job.country).jobs.put(job)
+
+    def _pool_failed(self, pool, error):
+        # Forget the pool so the next request gets a fresh attempt, and fail whatever queued up behind it.
+        # Puts happen under the same lock, so nothing can sneak into the queue after it's drained.
+        with self._pool_lock:
+            if self._pools.get(pool.locale) is pool:
+                del self._pools[pool.locale]
+            stranded = []
+            while not pool.jobs.empty():
+                stranded.append(pool.jobs.get_nowait())
+        for job in stranded:
+            self._fail_job(job, f"Error - Worker pool failed: {error}")
+
+    def _fail_job(self, job, rank):
+        self._finish(job, {"keyword": job.keyword, "rank": rank, "url": "", "title": "", "page": 0, "status": "Error",
+                           "failure_class": grt.FAILURE_DRIVER_CRASH}, fetched=False)
+
+    def submit(self, keyword, language="en", country="us", max_pages=None, max_age_s=None):
+        """Returns (job, how it was served): "cache", "coalesced" or "queued".
+
+        Raises LocaleNotAvailable for locales that aren't allowed or don't fit under the pool cap.
+        """
+        with self._pool_lock:
+            self._admit_locked(f"{language}-{country}")
+        job = CheckJob(keyword, language, country, max_pages or self.default_max_pages)
+        max_age_s = self.cache_ttl_s if max_age_s is None else min(max_age_s, self.cache_ttl_s)
+        with self._lock:
+            self._counters['requests'] += 1
+            cached = self._cache.get(job.key)
+            if cached and time.monotonic() - cached[1] <= max_age_s:
+                self._cache.move_to_end(job.key)
+                self._counters['cache_hits'] += 1
+                job.status, job.result, job.source = "done", cached[0], "cache"
+                job.started_at = job.finished_at = time.monotonic()
+                job.done.set()
+                self._remember(job)
+                return job, "cache"
+            running = self._in_flight.get(job.key)
+            if running:
+                running.coalesced_requests += 1
+                self._counters['coalesced'] += 1
+                return running, "coalesced"
+            self._in_flight[job.key] = job
+            self._remember(job)
+            self._counters['fetches'] += 1
+        try:
+            self._enqueue(job)
+        except LocaleNotAvailable as e: # Another locale grabbed the last pool slot since we checked
+            self._fail_job(job, f"Error - {e}")
+        return job, "queued"
+
+    def get(self, check_id):
+        with self._lock:
+            return self._jobs.get(check_id)
+
+    def _remember(self, job):
+        self._jobs[job.check_id] = job
+        while len(self._jobs) > SERVICE_JOB_HISTORY:
+            self._jobs.popitem(last=False)
+
+    def _worker_loop(self, pool, tracker):
+        while True:
+            job = pool.jobs.get()
+            if job is None:
+                return
+            with self._lock:
+                pool.busy += 1
+                job.status, job.started_at = "running", time.monotonic()
+            try:
+                result = grt._paced_check(tracker, job.keyword, job.max_pages)
+            except Exception as e:
+                logging.error(f"[{tracker.worker_id}] Check for '{job.keyword}' blew up: {type(e).__name__} - {e}")
+                result = tracker._failure_result(job.keyword, grt.FAILURE_UNEXPECTED)
+            with self._lock:
+                pool.busy -= 1
+            self._finish(job, result)
+
+    def _finish(self, job, result, fetched=True):
+        with self._lock:
+            job.result, job.status, job.finished_at = result, "done", time.monotonic()
+            self._in_flight.pop(job.key, None)
+            if result.get('status') in GOOD_STATUSES:
+                self._cache[job.key] = (result, job.finished_at)
+                self._cache.move_to_end(job.key)
+                while len(self._cache) > SERVICE_MAX_CACHE_ENTRIES:
+                    self._cache.popitem(last=False)
+            if fetched:
+                self._latencies.append((job.started_at - job.submitted_at, job.finished_at - job.submitted_at))
+            self._counters[f"status_{result.get('status', 'Error')}"] += 1
+        job.done.set()
+
+    def metrics(self):
+        with self._lock:
+            pools = {locale: {"workers": len(pool.trackers), "busy": pool.busy, "queue_depth": pool.jobs.qsize(),
+                              "starting": not pool.ready.is_set()}
+                     for locale, pool in list(self._pools.items())}
+            latencies = np.array(self._latencies, dtype=float).reshape(-1, 2)
+            counters = dict(self._counters)
+            in_flight, cached = len(self._in_flight), len(self._cache)
+
+        def percentiles(values):
+            if not len(values):
+                return None
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "max": round(values.max(), 3)}
+
+        retry_summary = self.retry_stats.summary()
+        return {
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "target_domain": self.target_domain,
+            "queue_depth": sum(pool["queue_depth"] for pool in pools.values()),
+            "in_flight": in_flight,
+            "pools": pools,
+            "cache_entries": cached,
+            "counters": counters,
+            "queue_wait_s": percentiles(latencies[:, 0]),
+            "latency_s": percentiles(latencies[:, 1]),
+            "retry_overhead": retry_summary.astype(object).where(retry_summary.notna(), None).to_dict("records"),
+            "hedges": {"issued": self.retry_stats.hedges_issued, "won": self.retry_stats.hedges_won},
+        }
+
+    def close(self):
+        with self._pool_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+class RankServiceHandler(BaseHTTPRequestHandler):
+    server_version = "RankService/1.0"
+
+    def log_message(self, format, *args):
+        logging.debug(f"rank-service: {self.address_string()} {format % args}")
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _check_params(self, params):
+        keyword = str(params.get("keyword", "")).strip()
+        language = str(params.get("language", grt.SEARCH_LANGUAGE)).lower()
+        country = str(params.get("country", grt.SEARCH_COUNTRY)).lower()
+        if not keyword or len(keyword) > 256:
+            raise ValueError("'keyword' is required (max 256 chars).")
+        if not LOCALE_PART.match(language) or not LOCALE_PART.match(country):
+            raise ValueError("'language' and 'country' must be 2-3 letter codes, e.g. en / us.")
+        max_pages = int(params.get("max_pages") or self.service.default_max_pages)
+        if not 1 <= max_pages <= SERVICE_MAX_PAGES:
+            raise ValueError(f"'max_pages' must be between 1 and {SERVICE_MAX_PAGES}.")
+        max_age_s = float(params["max_age_s"]) if params.get("max_age_s") not in (None, "") else None
+        return dict(keyword=keyword, language=language, country=country, max_pages=max_pages, max_age_s=max_age_s)
+
+    def _wait_s(self, params):
+        return min(max(float(params.get("wait") or 0), 0.0), SERVICE_MAX_WAIT_S)
+
+    def _submit_and_reply(self, params):
+        try:
+            check_params, wait_s = self._check_params(params), self._wait_s(params)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            job, served = self.service.submit(**check_params)
+        except LocaleNotAvailable as e:
+            self._send_json(403, {"error": str(e)})
+            return
+        if wait_s:
+            job.done.wait(wait_s)
+        self._send_json(200 if job.done.is_set() else 202, {**job.to_dict(), "served": served})
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+        if parsed.path == "/health":
+            self._send_json(200, {"ok": True})
+        elif parsed.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        elif parsed.path == "/rank":
+            params.setdefault("wait", SERVICE_MAX_WAIT_S)
+            self._submit_and_reply(params)
+        elif parsed.path.startswith("/checks/"):
+            job = self.service.get(parsed.path[len("/checks/"):])
+            if not job:
+                self._send_json(404, {"error": "No such check (or it's too old)."})
+                return
+            try:
+                wait_s = self._wait_s(params)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            if wait_s:
+                job.done.wait(wait_s)
+            self._send_json(200 if job.done.is_set() else 202, job.to_dict())
+        else:
+            self._send_json(404, {"error": "Try /checks, /rank, /metrics or /health."})
+
+    def do_POST(self):
+        if urllib.parse.urlparse(self.path).path != "/checks":
+            self._send_json(404, {"error": "POST goes to /checks."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Body must be a JSON object.")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Bad JSON: {e}"})
+            return
+        self._submit_and_reply(params)
+
+
+class RankServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, RankServiceHandler)
+        self.service = service
+
+
+def start_rank_service(target_domain, host=SERVICE_HOST, port=SERVICE_PORT, search_base_url=None,
+                       warm_locales=SERVICE_WARM_LOCALES):
+    """Starts the service and its HTTP server on a background thread. Returns (service, http_server)."""
+    service = RankCheckService(target_domain, search_base_url=search_base_url)
+    warming = [service.pool_for(*locale.lower().split("-")) for locale in warm_locales]
+    for pool in warming: # All warm locales boot side by side; serve once they're up
+        pool.ready.wait()
+    http_server = RankServiceServer((host, port), service)
+    threading.Thread(target=http_server.serve_forever, name="rank-service-http", daemon=True).start()
+    logging.info(f"Rank service listening on http://{host}:{http_server.server_address[1]} for '{target_domain}'.")
+    return service, http_server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP service for on-demand Google rank checks.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--domain", default=grt.TARGET_DOMAIN)
+    parser.add_argument("--fixture", action="store_true", help="Serve fake SERPs locally instead of hitting Google")
+    args = parser.parse_args()
+
+    fixture_server = None
+    search_base_url = None
+    if args.fixture:
+        from serp_fixture_server import start_fixture_server
+        fixture_server = start_fixture_server(target_domain=args.domain)
+        search_base_url = fixture_server.base_url
+        grt.SESSION_STATE_DIR = None # Fixture cookies have no business in the real Google profiles
+
+    service, http_server = start_rank_service(args.domain, host=args.host, port=args.port,
+                                              search_base_url=search_base_url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logging.warning("Ctrl+C. Shutting the rank service down.")
+    finally:
+        http_server.shutdown()
+        service.close()
+        if fixture_server:
+            fixture_server.shutdown()
+        logging.info("--- Rank service signing off. ---")
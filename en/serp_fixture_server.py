@@ -0,0 +1,126 @@
+# serp_fixture_server.py
+# A tiny fake Google SERP server for testing and benchmarking without getting the real thing angry.
+# Point the tracker at it with SEARCH_BASE_URL = "http://127.0.0.1:8765" (or search_base_url=...).
+#
+#   python serp_fixture_server.py --port 8765 --domain wikipedia.org --latency 0.3
+#
+# Pages look just enough like Google for our selectors: div.g .yuRUbf > a with an h3, and an a#pnnext.
+# Keywords containing "captcha" get the CAPTCHA form, keywords containing "nothing" get an empty SERP.
+
+import argparse
+import hashlib
+import html
+import logging
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESULTS_PER_PAGE = 10
+TOTAL_RESULTS = 50 # Five pages' worth, then no more "Next"
+FILLER_DOMAINS = ["example.com", "example.net", "example.org", "sample.io", "demo.dev", "filler.info"]
+
+
+def fixture_rank(keyword, target_domain):
+    """Where the target "ranks" for a keyword: stable per keyword, None for roughly one keyword in five."""
+    digest = int(hashlib.sha1(f"{keyword}|{target_domain}".encode("utf-8")).hexdigest(), 16)
+    return None if digest % 5 == 0 else digest % 30 + 1
+
+
+class FixtureSerpHandler(BaseHTTPRequestHandler):
+    server_version = "FixtureSERP/1.0"
+
+    def log_message(self, format, *args):
+        logging.debug(f"fixture-serp: {format % args}")
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        params = urllib.parse.parse_qs(parsed.query)
+        if parsed.path != "/search":
+            self._send(404, "<html><body>Nope.</body></html>")
+            return
+        time.sleep(self.server.latency) # Pretend to be a real server on the far side of the planet
+        keyword = params.get("q", [""])[0]
+        start = int(params.get("start", ["0"])[0] or 0)
+        self.server.count_request(keyword)
+        if "captcha" in keyword.lower():
+            self._send(200, "<html><body><h1>Our systems have detected unusual traffic</h1>"
+                            "<form id='captcha-form'><div>reCAPTCHA</div></form></body></html>")
+        else:
+            self._send(200, self.server.render_serp(keyword, start))
+
+    def _send(self, status, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FixtureSerpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, target_domain="wikipedia.org", latency=0.0, ranks=None):
+        super().__init__(address, FixtureSerpHandler)
+        self.target_domain = target_domain
+        self.latency = latency
+        self.ranks = ranks or {} # keyword -> rank (or None) overrides for fixture_rank()
+        self.requests_by_keyword = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self, keyword):
+        with self._lock:
+            self.requests_by_keyword[keyword] = self.requests_by_keyword.get(keyword, 0) + 1
+
+    def rank_for(self, keyword):
+        return self.ranks[keyword] if keyword in self.ranks else fixture_rank(keyword, self.target_domain)
+
+    def render_serp(self, keyword, start):
+        target_rank = self.rank_for(keyword)
+        total = 0 if "nothing" in keyword.lower() else TOTAL_RESULTS
+        blocks = []
+        for rank in range(start + 1, min(start + RESULTS_PER_PAGE, total) + 1):
+            if rank == target_rank:
+                url = f"https://{self.target_domain}/wiki/{urllib.parse.quote(keyword)}"
+            else:
+                url = f"https://www.{FILLER_DOMAINS[rank % len(FILLER_DOMAINS)]}/{rank}/{urllib.parse.quote(keyword)}"
+            blocks.append(f"<div class='g'><div class='yuRUbf'><a href='{html.escape(url)}'>"
+                          f"<h3>{html.escape(keyword)} - result {rank}</h3></a></div></div>")
+        next_link = ""
+        if start + RESULTS_PER_PAGE < total:
+            next_query = urllib.parse.urlencode({"q": keyword, "start": start + RESULTS_PER_PAGE})
+            next_link = f"<footer><a id='pnnext' aria-label='Next page' href='/search?{next_query}'>Next</a></footer>"
+        return (f"<html><head><title>{html.escape(keyword)} - Fixture Search</title></head>"
+                f"<body><div id='search'>{''.join(blocks)}</div>{next_link}</body></html>")
+
+
+def start_fixture_server(port=0, target_domain="wikipedia.org", latency=0.0, ranks=None):
+    """Starts the server on a background thread. port=0 grabs any free port; see `server.base_url`."""
+    server = FixtureSerpServer(("127.0.0.1", port), target_domain=target_domain, latency=latency, ranks=ranks)
+    threading.Thread(target=server.serve_forever, name="fixture-serp", daemon=True).start()
+    logging.info(f"Fixture SERP server up at {server.base_url} (target: {target_domain}, latency: {latency}s)")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Google SERPs for offline rank tracker runs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--domain", default="wikipedia.org", help="Domain that shows up in the fake results")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to stall every response")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(module)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    fixture_server = FixtureSerpServer(("127.0.0.1", args.port), target_domain=args.domain, latency=args.latency)
+    logging.info(f"Fixture SERP server listening on {fixture_server.base_url}. Ctrl+C to stop.")
+    try:
+        fixture_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fixture_server.server_close()
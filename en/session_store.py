@@ -0,0 +1,120 @@
+# session_store.py
+# Keeps warm browser session state (consent/SOCS cookies and friends) between runs and across workers,
+# so a fresh Chrome doesn't have to sit through the consent dance or look like a brand-new client.
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+class SessionProfile:
+    """One saved session: the cookies a worker had after some successful checks, for one locale."""
+    def __init__(self, profile_id, locale, path, cookies=None, saved_at=None):
+        self.profile_id = profile_id
+        self.locale = locale
+        self.path = path
+        self.cookies = cookies or []
+        self.saved_at = saved_at
+
+    @property
+    def is_warm(self):
+        return bool(self.cookies)
+
+
+class SessionStateStore:
+    """A per-locale pool of session profiles on disk.
+
+    Workers lease a profile when their driver starts, preferring the freshest one nobody else is using.
+    Once the pool is full (leased-but-unsaved profiles count too) they share the least-leased one.
+    Profiles older than `max_age_hours` get deleted, so do the oldest idle ones beyond the pool size,
+    and so does any profile that ran into a CAPTCHA (see `discard`), since that session is burned anyway.
+    """
+    def __init__(self, directory, max_age_hours=72, profiles_per_locale=4):
+        self.directory = directory
+        self.max_age_s = max_age_hours * 3600
+        self.profiles_per_locale = profiles_per_locale
+        self._leases = {} # profile path -> number of workers currently using it
+        self._leased = {} # profile path -> the SessionProfile those workers share (may not be on disk yet)
+        self._lock = threading.Lock()
+
+    def _locale_dir(self, locale):
+        return os.path.join(self.directory, locale)
+
+    def _load(self, path, locale):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Session profile '{path}' is unreadable, tossing it: {e}")
+            self._delete(path)
+            return None
+        now = time.time()
+        if now - data.get("saved_at", 0) > self.max_age_s:
+            logging.info(f"Session profile '{os.path.basename(path)}' ({locale}) went stale, expiring it.")
+            self._delete(path)
+            return None
+        cookies = [c for c in data.get("cookies", []) if not c.get("expiry") or c["expiry"] > now]
+        return SessionProfile(data.get("profile_id"), locale, path, cookies, data.get("saved_at"))
+
+    def _delete(self, path):
+        try: os.remove(path)
+        except OSError: pass
+
+    def checkout(self, locale):
+        """Leases the best profile for `locale`; a blank new one if the pool has room and nothing's free."""
+        with self._lock:
+            os.makedirs(self._locale_dir(locale), exist_ok=True)
+            paths = [os.path.join(self._locale_dir(locale), name)
+                     for name in os.listdir(self._locale_dir(locale)) if name.endswith(".json")]
+            idle = [profile for profile in (self._load(path, locale) for path in paths if path not in self._leased) if profile]
+            idle.sort(key=lambda profile: -(profile.saved_at or 0))
+            leased = [profile for profile in self._leased.values() if profile.locale == locale]
+            # Over the pool size (e.g. it got shrunk, or another process went wild): the oldest idle ones go
+            for extra in idle[max(0, self.profiles_per_locale - len(leased)):]:
+                logging.info(f"Session pool for {locale} is over {self.profiles_per_locale} profiles, dropping '{extra.profile_id}'.")
+                self._delete(extra.path)
+            idle = idle[:max(0, self.profiles_per_locale - len(leased))]
+            if idle:
+                profile = idle[0]
+            elif len(leased) < self.profiles_per_locale:
+                profile_id = uuid.uuid4().hex[:12]
+                profile = SessionProfile(profile_id, locale, os.path.join(self._locale_dir(locale), f"{profile_id}.json"))
+            else:
+                profile = min(leased, key=lambda profile: (self._leases[profile.path], -(profile.saved_at or 0)))
+            self._leases[profile.path] = self._leases.get(profile.path, 0) + 1
+            self._leased[profile.path] = profile
+        logging.info(f"Session profile '{profile.profile_id}' ({locale}) checked out, "
+                     f"{'warm with ' + str(len(profile.cookies)) + ' cookies' if profile.is_warm else 'cold'}.")
+        return profile
+
+    def save(self, profile, cookies):
+        profile.cookies = cookies
+        profile.saved_at = time.time()
+        payload = {"profile_id": profile.profile_id, "locale": profile.locale, "saved_at": profile.saved_at,
+                   "cookies": cookies}
+        tmp_path = f"{profile.path}.{uuid.uuid4().hex[:6]}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, profile.path) # Atomic, so another worker/process never reads half a file
+        except OSError as e:
+            logging.warning(f"Couldn't save session profile '{profile.profile_id}': {e}")
+            self._delete(tmp_path)
+
+    def release(self, profile):
+        with self._lock:
+            remaining = self._leases.get(profile.path, 0) - 1
+            if remaining > 0:
+                self._leases[profile.path] = remaining
+            else:
+                self._leases.pop(profile.path, None)
+                self._leased.pop(profile.path, None)
+
+    def discard(self, profile):
+        """Burned (e.g. CAPTCHA'd) session: delete it so nobody else inherits the heat."""
+        logging.warning(f"Session profile '{profile.profile_id}' ({profile.locale}) is burned, discarding it.")
+        self.release(profile)
+        self._delete(profile.path)
@@ -0,0 +1,56 @@
+import logging
+
+import google_rank_tracker as grt
+
+
+class StubTracker:
+    def __init__(self, keywords=0, age_s=0.0, rss_mb=None):
+        self.keywords_since_start = keywords
+        self.age_s = age_s
+        self.last_rss_mb = rss_mb
+
+    def driver_age_s(self):
+        return self.age_s
+
+
+def test_fresh_driver_is_kept():
+    lifecycle = grt.DriverLifecycle(max_keywords=40, max_age_minutes=45, max_rss_mb=1500)
+    assert lifecycle.recycle_reason(StubTracker(keywords=39, age_s=44 * 60, rss_mb=1499)) is None
+
+
+def test_recycle_on_keyword_count():
+    lifecycle = grt.DriverLifecycle(max_keywords=40, max_age_minutes=None, max_rss_mb=None)
+    assert lifecycle.recycle_reason(StubTracker(keywords=40)).startswith("keywords")
+
+
+def test_recycle_on_age():
+    lifecycle = grt.DriverLifecycle(max_keywords=None, max_age_minutes=45, max_rss_mb=None)
+    assert lifecycle.recycle_reason(StubTracker(age_s=45 * 60)).startswith("age")
+
+
+def test_recycle_on_memory():
+    lifecycle = grt.DriverLifecycle(max_keywords=None, max_age_minutes=None, max_rss_mb=1500)
+    assert lifecycle.recycle_reason(StubTracker(rss_mb=1600.0)).startswith("memory")
+    assert lifecycle.recycle_reason(StubTracker(rss_mb=None)) is None # No reading (no psutil): can't tell
+
+
+def test_disabled_limits_never_recycle():
+    lifecycle = grt.DriverLifecycle(max_keywords=None, max_age_minutes=None, max_rss_mb=None)
+    assert lifecycle.recycle_reason(StubTracker(keywords=10 ** 6, age_s=10 ** 6, rss_mb=10 ** 6)) is None
+
+
+def test_record_recycle_counts_by_reason():
+    lifecycle = grt.DriverLifecycle()
+    lifecycle.record_recycle("keywords (40 >= 40)")
+    lifecycle.record_recycle("keywords (41 >= 40)")
+    lifecycle.record_recycle("memory (1600MB >= 1500MB)")
+    assert dict(lifecycle.recycles) == {"keywords": 2, "memory": 1}
+
+
+def test_warns_once_when_rss_limit_set_without_psutil(monkeypatch, caplog):
+    monkeypatch.setattr(grt, "psutil", None)
+    monkeypatch.setattr(grt.DriverLifecycle, "_warned_no_psutil", False)
+    with caplog.at_level(logging.WARNING):
+        grt.DriverLifecycle(max_rss_mb=1500)
+        grt.DriverLifecycle(max_rss_mb=1500)
+    assert sum("psutil" in record.getMessage() for record in caplog.records) == 1
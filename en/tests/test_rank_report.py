@@ -0,0 +1,33 @@
+import pandas as pd
+
+from rank_history import load_result_history
+from rank_report import ALL_KEYWORDS_TAG, UNTAGGED_TAG, build_rank_report
+
+
+def _results(rows):
+    return pd.DataFrame(rows, columns=['timestamp_executed', 'keyword', 'target_domain_checked', 'rank', 'status'])
+
+
+def test_report_with_only_failed_checks_is_empty(tmp_path):
+    current = _results([("2024-06-03 10:00:00", "a", "wikipedia.org", "CAPTCHA", "CAPTCHA"),
+                        ("2024-06-03 10:01:00", "b", "wikipedia.org", "Error - Max Retries (timeout)", "Error")])
+    report = build_rank_report(load_result_history(directory=str(tmp_path)), current)
+    assert report.empty
+
+
+def test_report_with_no_results_at_all_is_empty(tmp_path):
+    assert build_rank_report(load_result_history(directory=str(tmp_path))).empty
+
+
+def test_report_aggregates_per_tag_and_period():
+    history = _results([("2024-06-03 10:00:00", "a", "wikipedia.org", "5", "Found"),
+                        ("2024-06-03 10:00:00", "b", "wikipedia.org", "Not Found in top 20", "Not Found"),
+                        ("2024-06-10 10:00:00", "a", "wikipedia.org", "2", "Found")])
+    report = build_rank_report(history, keyword_tags={"a": ["brand"]}).set_index(['tag', 'period'])
+
+    week2 = pd.Timestamp("2024-06-10")
+    assert report.loc[(ALL_KEYWORDS_TAG, week2), 'keywords'] == 2 # b carried forward from week 1
+    assert report.loc[(ALL_KEYWORDS_TAG, week2), 'checked'] == 1
+    assert report.loc[("brand", week2), 'avg_position'] == 2
+    assert report.loc[("brand", week2), 'gains'] == 1
+    assert report.loc[(UNTAGGED_TAG, week2), 'found'] == 0
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from rank_history import NOT_FOUND_RANK, load_result_history, parse_rank_column
+from rank_scheduler import build_check_schedule
+
+NOW = pd.Timestamp("2024-06-01 12:00:00")
+
+
+def _history(rows):
+    history = pd.DataFrame(rows, columns=['timestamp_executed', 'keyword', 'target_domain_checked', 'rank', 'status'])
+    history['timestamp_executed'] = pd.to_datetime(history['timestamp_executed'])
+    history['rank_num'] = parse_rank_column(history['rank'])
+    return history
+
+
+def test_parse_rank_column():
+    parsed = parse_rank_column(pd.Series([1, "7", "Not Found in top 20", "CAPTCHA", "Error - Timeout", None, "7"]))
+    np.testing.assert_array_equal(parsed, [1, 7, NOT_FOUND_RANK, np.nan, np.nan, np.nan, 7])
+
+
+def test_load_result_history_empty_is_typed(tmp_path):
+    history = load_result_history(directory=str(tmp_path))
+    assert history.empty
+    assert pd.api.types.is_datetime64_any_dtype(history['timestamp_executed'])
+    assert history['rank_num'].dtype == float
+
+
+def test_load_result_history_reads_reports(tmp_path):
+    _history([("2024-05-01 10:00:00", "a", "wikipedia.org", "3", "Found"),
+              ("2024-05-01 10:01:00", "b", "wikipedia.org", "Not Found in top 20", "Not Found")]
+             ).drop(columns='rank_num').to_csv(tmp_path / "google_rank_report_20240501.csv", index=False)
+    history = load_result_history(directory=str(tmp_path))
+    assert history['rank_num'].tolist() == [3.0, NOT_FOUND_RANK]
+    assert pd.api.types.is_datetime64_any_dtype(history['timestamp_executed'])
+
+
+def test_schedule_with_no_history_checks_everything(tmp_path):
+    schedule = build_check_schedule(load_result_history(directory=str(tmp_path)), ['a', 'b'], 'wikipedia.org', 2,
+                                    now=NOW)
+    assert schedule['selected'].all()
+    assert schedule['last_checked'].isna().all()
+
+
+def test_schedule_error_only_history_counts_as_never_checked():
+    history = _history([("2024-05-31 10:00:00", "a", "wikipedia.org", "CAPTCHA", "CAPTCHA"),
+                        ("2024-05-31 10:05:00", "a", "wikipedia.org", "Error - Max Retries (timeout)", "Error")])
+    schedule = build_check_schedule(history, ['a'], 'wikipedia.org', 2, now=NOW)
+    assert bool(schedule.loc[0, 'due']) and bool(schedule.loc[0, 'selected'])
+    assert schedule.loc[0, 'urgency'] == np.inf
+
+
+def test_schedule_skips_fresh_stable_keywords():
+    history = _history([(f"2024-05-{day:02d} 10:00:00", "stable", "wikipedia.org", "1", "Found")
+                        for day in range(20, 32)])
+    schedule = build_check_schedule(history, ['stable', 'new'], 'wikipedia.org', 2, now=NOW)
+    selected = schedule.set_index('keyword')['selected']
+    assert not selected['stable'] and selected['new']
+
+
+def test_schedule_budget_defers_least_urgent():
+    history = _history([("2024-05-01 10:00:00", "old", "wikipedia.org", "25", "Found"),
+                        ("2024-05-30 10:00:00", "recent", "wikipedia.org", "25", "Found")])
+    # Never-checked keywords cost max_pages; the others cost up to the page they were last seen on
+    schedule = build_check_schedule(history, ['recent', 'old', 'never'], 'wikipedia.org', 3, request_budget=6,
+                                    min_interval_days=1, max_interval_days=1, now=NOW)
+    by_keyword = schedule.set_index('keyword')
+    assert by_keyword['due'].all()
+    assert schedule['keyword'].tolist() == ['never', 'old', 'recent']
+    assert by_keyword['selected'].to_dict() == {'never': True, 'old': True, 'recent': False}
+    assert by_keyword.loc['recent', 'deferred']
@@ -0,0 +1,237 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+import google_rank_tracker as grt
+import rank_service
+
+
+class FakeTracker:
+    """Stands in for a warm Chrome worker: answers from the farm's script, holds at the farm's gate."""
+    def __init__(self, farm, worker_id):
+        self.farm = farm
+        self.worker_id = worker_id
+        self.checks_done = 0
+        self.check_started_at = None
+        self.last_check_finished_at = None
+        self.cancel_check = threading.Event()
+        self.closed = False
+
+    def get_rank_for_keyword(self, keyword, max_pages=3):
+        with self.farm.lock:
+            self.farm.fetches.append(keyword)
+        self.farm.gate.wait(10)
+        if "captcha" in keyword:
+            return self._failure_result(keyword, grt.FAILURE_CAPTCHA)
+        if "error" in keyword:
+            return self._failure_result(keyword, grt.FAILURE_TIMEOUT)
+        return {"keyword": keyword, "rank": len(keyword), "url": "https://wikipedia.org/x", "title": "x", "page": 1,
+                "status": "Found", "failure_class": None}
+
+    def _failure_result(self, keyword, failure_class, page=0, rank=None):
+        return grt.GoogleRankTracker._failure_result(self, keyword, failure_class, page, rank)
+
+    def close(self, keep_session=False):
+        self.closed = True
+
+
+class TrackerFarm:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fetches = []
+        self.pool_starts = []
+        self.broken_languages = set()
+        self.slow_start = {} # language -> Event the pool start waits on
+
+    def start_trackers(self, num_browsers, tabs_per_browser=1, worker_prefix="worker", **tracker_kwargs):
+        language = tracker_kwargs["language"]
+        self.pool_starts.append(worker_prefix)
+        if language in self.slow_start:
+            self.slow_start[language].wait(10)
+        if language in self.broken_languages:
+            raise WebDriverException("chrome won't start")
+        trackers = [FakeTracker(self, f"{worker_prefix}-{n + 1}") for n in range(num_browsers)]
+        return [], trackers
+
+
+@pytest.fixture
+def farm(monkeypatch):
+    farm = TrackerFarm()
+    monkeypatch.setattr(grt, "start_trackers", farm.start_trackers)
+    monkeypatch.setattr(grt, "SESSION_STATE_DIR", None)
+    monkeypatch.setattr(grt, "NUM_WORKERS", 1)
+    monkeypatch.setattr(grt, "TABS_PER_BROWSER", 1)
+    monkeypatch.setattr(grt, "RANDOM_DELAY_BETWEEN_KEYWORDS", (0, 0))
+    return farm
+
+
+@pytest.fixture
+def service(farm):
+    service, http_server = rank_service.start_rank_service("wikipedia.org", port=0, warm_locales=["en-us"])
+    service.base_url = f"http://127.0.0.1:{http_server.server_address[1]}"
+    yield service
+    farm.gate.set()
+    for event in farm.slow_start.values():
+        event.set()
+    http_server.shutdown()
+    http_server.server_close()
+    service.close()
+
+
+def _get(service, path):
+    try:
+        with urllib.request.urlopen(service.base_url + path, timeout=15) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_rank_calls_coalesce_then_hit_cache(service, farm):
+    farm.gate.clear()
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(_get(service, "/rank?keyword=python"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: service.metrics()["counters"].get("coalesced", 0) == 4)
+    farm.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert farm.fetches == ["python"]
+    assert {status for status, _ in replies} == {200}
+    assert len({body["check_id"] for _, body in replies}) == 1
+    assert sorted(body["served"] for _, body in replies) == ["coalesced"] * 4 + ["queued"]
+    assert replies[0][1]["result"]["rank"] == len("python")
+
+    status, body = _get(service, "/rank?keyword=python")
+    assert (status, body["served"], body["source"]) == (200, "cache", "cache")
+    assert farm.fetches == ["python"]
+
+
+def test_post_then_poll_check(service):
+    request = urllib.request.Request(service.base_url + "/checks", json.dumps({"keyword": "posted"}).encode(),
+                                     {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=15) as response:
+        check_id = json.loads(response.read())["check_id"]
+    status, body = _get(service, f"/checks/{check_id}?wait=5")
+    assert (status, body["status"], body["result"]["status"]) == (200, "done", "Found")
+    assert _get(service, "/checks/chk-nope")[0] == 404
+
+
+def test_max_age_and_ttl_force_a_new_fetch(service, farm):
+    job, _ = service.submit("fresh")
+    job.done.wait(5)
+    assert service.submit("fresh")[1] == "cache"
+
+    job, served = service.submit("fresh", max_age_s=0)
+    assert served == "queued"
+    job.done.wait(5)
+
+    service.cache_ttl_s = 0.05
+    time.sleep(0.1)
+    job, served = service.submit("fresh")
+    assert served == "queued"
+    job.done.wait(5)
+    assert farm.fetches == ["fresh"] * 3
+
+
+@pytest.mark.parametrize("keyword", ["captcha wall", "error page"])
+def test_failed_results_are_not_cached(service, farm, keyword):
+    for _ in range(2):
+        job, served = service.submit(keyword)
+        assert served == "queued"
+        job.done.wait(5)
+        assert job.result["status"] in ("CAPTCHA", "Error")
+    assert farm.fetches == [keyword, keyword]
+
+
+def test_bad_input_is_rejected(service):
+    assert _get(service, "/rank?keyword=x&language=english")[0] == 400
+    assert _get(service, "/rank?language=en")[0] == 400
+    assert _get(service, "/rank?keyword=x&max_pages=99")[0] == 400
+
+
+def test_pool_cap_returns_403(service, farm):
+    service.max_pools = 2
+    assert _get(service, "/rank?keyword=hallo&language=de&country=de")[0] == 200
+    status, body = _get(service, "/rank?keyword=bonjour&language=fr&country=fr")
+    assert status == 403 and "limit" in body["error"]
+    assert sorted(service.metrics()["pools"]) == ["de-de", "en-us"]
+
+
+def test_allow_list_returns_403(service):
+    service.allowed_locales = {"en-us"}
+    status, body = _get(service, "/rank?keyword=hallo&language=de&country=de")
+    assert status == 403 and "en-us" in body["error"]
+    assert _get(service, "/rank?keyword=hello")[0] == 200
+
+
+def test_failed_pool_start_fails_queued_jobs(service, farm):
+    farm.broken_languages.add("fr")
+    farm.slow_start["fr"] = threading.Event() # Both jobs queue up before Chrome gives up
+    jobs = [service.submit(keyword, language="fr", country="fr")[0] for keyword in ("un", "deux")]
+    farm.slow_start["fr"].set()
+    for job in jobs:
+        assert job.done.wait(5)
+        assert job.result["status"] == "Error" and "Worker pool failed" in job.result["rank"]
+    _wait_for(lambda: "fr-fr" not in service.metrics()["pools"])
+
+    farm.broken_languages.clear()
+    del farm.slow_start["fr"] # Next request gets a fresh attempt at the pool
+    job, _ = service.submit("trois", language="fr", country="fr")
+    assert job.done.wait(5) and job.result["status"] == "Found"
+    assert farm.pool_starts.count("fr-fr") == 2
+
+
+def test_cold_locale_does_not_block_others(service, farm):
+    farm.slow_start["de"] = threading.Event()
+    de_job, _ = service.submit("hallo", language="de", country="de")
+    started = time.monotonic()
+    en_job, _ = service.submit("hello")
+    assert en_job.done.wait(5)
+    assert time.monotonic() - started < 2
+    assert not de_job.done.is_set()
+    assert service.metrics()["pools"]["de-de"]["starting"]
+
+    farm.slow_start["de"].set()
+    assert de_job.done.wait(5) and de_job.result["status"] == "Found"
+
+
+def test_metrics_show_queue_depth_and_latency(service, farm):
+    farm.gate.clear()
+    jobs = [service.submit(keyword)[0] for keyword in ("one", "two", "three")]
+    _wait_for(lambda: len(farm.fetches) == 1)
+    metrics = service.metrics()
+    assert (metrics["queue_depth"], metrics["in_flight"]) == (2, 3)
+    assert metrics["pools"]["en-us"]["busy"] == 1
+
+    farm.gate.set()
+    for job in jobs:
+        job.done.wait(5)
+    status, metrics = _get(service, "/metrics")
+    assert status == 200
+    assert (metrics["queue_depth"], metrics["in_flight"]) == (0, 0)
+    assert metrics["counters"]["fetches"] == 3
+    assert metrics["latency_s"]["p50"] >= 0 and metrics["queue_wait_s"]["max"] >= 0
+
+
+def test_close_shuts_down_trackers(farm):
+    service = rank_service.RankCheckService("wikipedia.org")
+    pool = service.pool_for("en", "us")
+    pool.ready.wait(5)
+    service.close()
+    assert all(tracker.closed for tracker in pool.trackers)
@@ -0,0 +1,212 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+import google_rank_tracker as grt
+
+FOUND = {"keyword": "kw", "rank": 3, "url": "https://wikipedia.org/x", "title": "x", "page": 1, "status": "Found",
+         "failure_class": None}
+FAILURES = {
+    grt.FAILURE_TIMEOUT: lambda: TimeoutException("slow page"),
+    grt.FAILURE_CAPTCHA: lambda: grt.CaptchaDetected(page=1),
+    grt.FAILURE_DRIVER_CRASH: lambda: WebDriverException("chrome not reachable"),
+    grt.FAILURE_PARSE_MISS: lambda: grt.ParseMiss("no selectors matched"),
+    grt.FAILURE_UNEXPECTED: lambda: ValueError("boom"),
+}
+
+
+class StubDriver:
+    """Just enough WebDriver for _check_keyword_once: a page with a results container and nothing we can parse."""
+    def __init__(self, url="https://www.google.com/search?q=kw", serp_is_empty=True):
+        self.current_url = url
+        self.serp_is_empty = serp_is_empty
+
+    def get(self, url):
+        pass
+
+    def find_elements(self, by, selector):
+        return [object()] if by == By.CSS_SELECTOR and selector == grt.RESULTS_CONTAINER_SELECTOR else []
+
+    def execute_script(self, script, *args):
+        return self.serp_is_empty if script == grt.EMPTY_SERP_JS else None
+
+    def quit(self):
+        pass
+
+
+class StubTracker(grt.GoogleRankTracker):
+    """No Chrome. `_check_keyword_once` plays back `script`: exceptions get raised, callables called, dicts returned."""
+    def __init__(self, script=(), **kwargs):
+        self.script = list(script)
+        self.attempts = 0
+        self.restarts = []
+        super().__init__(target_domain="wikipedia.org", **kwargs)
+
+    def _setup_driver(self):
+        self.driver = StubDriver()
+
+    def _restart_driver(self, failure_class=None):
+        self.restarts.append(failure_class)
+        return True
+
+    def _check_keyword_once(self, keyword, max_pages):
+        self.attempts += 1
+        step = self.script.pop(0) if self.script else dict(FOUND, keyword=keyword)
+        if isinstance(step, BaseException):
+            raise step
+        return step(self) if callable(step) else step
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(grt, "RETRY_POLICIES", {name: dict(policy, backoff=(0, 0))
+                                                for name, policy in grt.RETRY_POLICIES.items()})
+    monkeypatch.setattr(grt, "TAKE_SCREENSHOTS_ON_ERROR", False)
+
+
+@pytest.mark.parametrize("failure_class", sorted(FAILURES))
+def test_classify_failure(failure_class):
+    assert grt.classify_failure(FAILURES[failure_class]()) == failure_class
+
+
+def test_classify_failure_other_webdriver_errors_are_unexpected():
+    assert grt.classify_failure(WebDriverException("element click intercepted")) == grt.FAILURE_UNEXPECTED
+    assert grt.classify_failure(WebDriverException("Shared browser is gone, can't open a tab in it.")) == grt.FAILURE_DRIVER_CRASH
+
+
+@pytest.mark.parametrize("failure_class", sorted(FAILURES))
+def test_each_class_stops_after_its_own_retries(failure_class):
+    policy = grt.RETRY_POLICIES[failure_class]
+    tracker = StubTracker([FAILURES[failure_class]() for _ in range(10)],
+                          circuit_breaker=grt.CircuitBreaker(threshold=99, cooldown=0))
+    result = tracker.get_rank_for_keyword("kw", max_pages=2)
+
+    assert tracker.attempts == policy["retries"] + 1
+    assert result["failure_class"] == failure_class
+    assert result["status"] == ("CAPTCHA" if failure_class == grt.FAILURE_CAPTCHA else "Error")
+    assert len(tracker.restarts) == (policy["retries"] if policy["restart_driver"] else 0)
+    row = tracker.retry_stats.summary().set_index("failure_class").loc[failure_class]
+    assert (row["failures"], row["retries"], row["gave_up"]) == (policy["retries"] + 1, policy["retries"], 1)
+
+
+def test_retry_budgets_are_per_class():
+    tracker = StubTracker([TimeoutException("slow"), grt.ParseMiss("?"), TimeoutException("slow")])
+    result = tracker.get_rank_for_keyword("kw", max_pages=2)
+    assert result["status"] == "Found"
+    assert tracker.attempts == 4
+
+
+def test_retries_argument_caps_all_classes():
+    tracker = StubTracker([TimeoutException("slow"), TimeoutException("slow")])
+    result = tracker.get_rank_for_keyword("kw", max_pages=2, retries=0)
+    assert tracker.attempts == 1
+    assert result["failure_class"] == grt.FAILURE_TIMEOUT
+
+
+def test_missing_driver_gets_revived_before_checking():
+    tracker = StubTracker()
+    tracker.driver = None
+    tracker._restart_driver = lambda failure_class=None: (tracker._setup_driver(), True)[1]
+    assert tracker.get_rank_for_keyword("kw", max_pages=2)["status"] == "Found"
+
+
+def test_circuit_breaker_opens_after_threshold():
+    breaker = grt.CircuitBreaker(threshold=2, cooldown=60)
+    assert breaker.record_captcha("proxy-a") is False
+    assert breaker.cooldown_remaining("proxy-a") == 0
+    assert breaker.record_captcha("proxy-a") is True
+    assert 59 < breaker.cooldown_remaining("proxy-a") <= 60
+    assert breaker.cooldown_remaining("proxy-b") == 0
+
+
+def test_circuit_breaker_success_resets_strikes():
+    breaker = grt.CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_captcha("w")
+    breaker.record_success("w")
+    assert breaker.record_captcha("w") is False
+
+
+def test_breaker_pause_records_time_actually_slept():
+    breaker = grt.CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_captcha("worker-1")
+    tracker = StubTracker(circuit_breaker=breaker)
+    threading.Timer(0.2, tracker.cancel_check.set).start()
+    started = time.monotonic()
+    result = tracker.get_rank_for_keyword("kw", max_pages=2)
+
+    assert time.monotonic() - started < 5
+    assert result["rank"] == "Error - Cancelled"
+    pause = tracker.retry_stats.summary().set_index("failure_class").loc[grt.FAILURE_CAPTCHA, "breaker_pause_s"]
+    assert 0 < pause < 5
+
+
+def test_retry_stats_summary_adds_up_overhead():
+    stats = grt.RetryStats()
+    stats.record_failure(grt.FAILURE_TIMEOUT, 2.0, backoff_seconds=5.0)
+    stats.record_failure(grt.FAILURE_TIMEOUT, 1.0, gave_up=True)
+    stats.record_breaker_pause(30.0)
+    summary = stats.summary().set_index("failure_class")
+    assert summary.loc[grt.FAILURE_TIMEOUT, ["failures", "retries", "gave_up"]].tolist() == [2, 1, 1]
+    assert summary.loc[grt.FAILURE_TIMEOUT, "overhead_s"] == 8.0
+    assert summary.loc[grt.FAILURE_CAPTCHA, "overhead_s"] == 30.0
+
+
+def test_hedge_winner_settles_and_loser_is_cancelled():
+    def stuck(tracker):
+        # Waits on a page that never shows up, like a real hung SERP; only cancellation gets it out
+        tracker._poll(lambda driver: None, timeout=30, poll_every=0.05)
+
+    slow, fast = StubTracker([stuck], worker_id="slow"), StubTracker(worker_id="fast")
+    fast.retry_stats = slow.retry_stats
+    started = time.monotonic()
+    results = grt.run_keyword_checks([slow, fast], ["kw"], 2, hedge_after=0.1)
+
+    assert time.monotonic() - started < 10
+    assert results[0]["status"] == "Found" and results[0]["worker_id"] == "fast"
+    assert slow.cancel_check.is_set()
+    assert slow.check_started_at is None # The loser finished winding down before run_keyword_checks returned
+    assert (slow.retry_stats.hedges_issued, slow.retry_stats.hedges_won) == (1, 1)
+
+
+def test_unhedged_run_returns_results_in_keyword_order(monkeypatch):
+    monkeypatch.setattr(grt, "RANDOM_DELAY_BETWEEN_KEYWORDS", (0, 0))
+    trackers = [StubTracker(worker_id=f"w{n}") for n in range(2)]
+    results = grt.run_keyword_checks(trackers, ["a", "b", "c"], 2)
+    assert [result["keyword"] for result in results] == ["a", "b", "c"]
+
+
+class SerpTracker(StubTracker):
+    """Runs the real _check_keyword_once against a StubDriver."""
+    _check_keyword_once = grt.GoogleRankTracker._check_keyword_once
+
+
+@pytest.fixture
+def no_settle_nap(monkeypatch):
+    monkeypatch.setattr(grt.random, "uniform", lambda low, high: 0.0)
+
+
+def test_empty_serp_is_not_found(no_settle_nap):
+    tracker = SerpTracker()
+    tracker.consent_settled = True
+    result = tracker._check_keyword_once("nothing", max_pages=2)
+    assert (result["status"], result["rank"]) == ("Not Found", "Not Found in top 0")
+
+
+def test_unreadable_serp_is_a_parse_miss(no_settle_nap):
+    tracker = SerpTracker()
+    tracker.consent_settled = True
+    tracker.driver.serp_is_empty = False
+    with pytest.raises(grt.ParseMiss):
+        tracker._check_keyword_once("weird layout", max_pages=2)
+
+
+def test_consent_redirect_is_not_a_captcha():
+    tracker = StubTracker()
+    tracker.driver = StubDriver(url="https://consent.google.com/ml?continue=https://www.google.com/search?q=kw")
+    assert tracker._check_for_captcha() is False
+    assert tracker._on_consent_wall() is True
+    tracker.driver = StubDriver(url="https://www.google.com/sorry/index?continue=x")
+    assert tracker._check_for_captcha() is True
@@ -0,0 +1,52 @@
+import re
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from serp_fixture_server import RESULTS_PER_PAGE, TOTAL_RESULTS, fixture_rank, start_fixture_server
+
+
+@pytest.fixture
+def fixture_server():
+    server = start_fixture_server(target_domain="wikipedia.org", ranks={"pinned": 13, "absent": None})
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _search(server, keyword, start=0):
+    query = urllib.parse.urlencode({"q": keyword, "start": start})
+    with urllib.request.urlopen(f"{server.base_url}/search?{query}", timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+def test_fixture_rank_is_stable():
+    assert fixture_rank("python", "wikipedia.org") == fixture_rank("python", "wikipedia.org")
+    ranks = [fixture_rank(f"keyword {n}", "wikipedia.org") for n in range(200)]
+    assert all(rank is None or 1 <= rank <= 30 for rank in ranks)
+    assert None in ranks
+
+
+def test_target_shows_up_at_its_rank(fixture_server):
+    page2 = _search(fixture_server, "pinned", start=RESULTS_PER_PAGE)
+    links = re.findall(r"<a href='([^']+)'><h3>", page2)
+    assert len(links) == RESULTS_PER_PAGE
+    assert "wikipedia.org" in links[13 - RESULTS_PER_PAGE - 1]
+    assert "id='pnnext'" in page2
+    assert "wikipedia.org" not in _search(fixture_server, "absent")
+
+
+def test_last_page_has_no_next_link(fixture_server):
+    assert "id='pnnext'" not in _search(fixture_server, "pinned", start=TOTAL_RESULTS - RESULTS_PER_PAGE)
+
+
+def test_captcha_and_empty_keywords(fixture_server):
+    assert "captcha-form" in _search(fixture_server, "captcha please")
+    assert "<div id='search'></div>" in _search(fixture_server, "nothing at all")
+
+
+def test_counts_requests_per_keyword(fixture_server):
+    _search(fixture_server, "pinned")
+    _search(fixture_server, "pinned", start=RESULTS_PER_PAGE)
+    assert fixture_server.requests_by_keyword == {"pinned": 2}
@@ -0,0 +1,58 @@
+import json
+import time
+
+from session_store import SessionStateStore
+
+COOKIE = {"name": "SOCS", "value": "abc", "domain": ".google.com", "path": "/"}
+
+
+def _profile_files(tmp_path, locale="en-us"):
+    return sorted(path.name for path in (tmp_path / locale).glob("*.json"))
+
+
+def test_checkout_caps_pool_including_unsaved_leases(tmp_path):
+    store = SessionStateStore(str(tmp_path), profiles_per_locale=2)
+    profiles = [store.checkout("en-us") for _ in range(5)]
+    assert len({profile.path for profile in profiles}) == 2
+    for profile in profiles:
+        store.save(profile, [COOKIE])
+    assert len(_profile_files(tmp_path)) == 2
+
+
+def test_shares_least_leased_profile_when_full(tmp_path):
+    store = SessionStateStore(str(tmp_path), profiles_per_locale=2)
+    first, second, third = (store.checkout("en-us") for _ in range(3))
+    assert third.path == first.path
+    fourth = store.checkout("en-us")
+    assert fourth.path == second.path
+
+
+def test_released_profile_is_reused_warm(tmp_path):
+    store = SessionStateStore(str(tmp_path), profiles_per_locale=2)
+    profile = store.checkout("en-us")
+    store.save(profile, [COOKIE])
+    store.release(profile)
+    again = SessionStateStore(str(tmp_path), profiles_per_locale=2).checkout("en-us")
+    assert again.profile_id == profile.profile_id and again.is_warm
+
+
+def test_checkout_prunes_oldest_extras_on_disk(tmp_path):
+    locale_dir = tmp_path / "en-us"
+    locale_dir.mkdir()
+    now = time.time()
+    for n in range(5):
+        (locale_dir / f"p{n}.json").write_text(json.dumps(
+            {"profile_id": f"p{n}", "locale": "en-us", "saved_at": now - n * 60, "cookies": [COOKIE]}))
+    store = SessionStateStore(str(tmp_path), profiles_per_locale=2)
+    profiles = [store.checkout("en-us") for _ in range(5)]
+    assert {profile.profile_id for profile in profiles} == {"p0", "p1"}
+    assert _profile_files(tmp_path) == ["p0.json", "p1.json"]
+
+
+def test_discard_deletes_profile(tmp_path):
+    store = SessionStateStore(str(tmp_path), profiles_per_locale=2)
+    profile = store.checkout("en-us")
+    store.save(profile, [COOKIE])
+    store.discard(profile)
+    assert _profile_files(tmp_path) == []
+    assert store.checkout("en-us").profile_id != profile.profile_id